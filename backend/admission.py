@@ -0,0 +1,255 @@
+import os
+import math
+import time
+import logging
+import threading
+from functools import wraps
+from collections import OrderedDict, deque
+
+# --- Admission control for model-backed routes ---
+# Each endpoint class has its own concurrency limit, so a burst of large contracts cannot take the
+# slots used by fraud and loan-risk scoring. Requests waiting for a slot are queued per Firebase uid
+# and served round-robin across users. A request whose estimated queueing delay is above the class's
+# latency target is refused immediately with 429 + Retry-After instead of timing out later.
+
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', '1') == '1'
+ADMISSION_MAX_QUEUED_PER_USER = int(os.getenv('ADMISSION_MAX_QUEUED_PER_USER', '4'))
+
+
+def _class_config(name, concurrency, latency_target_ms, service_ms):
+    prefix = f'ADMISSION_{name.upper()}'
+    return {
+        'concurrency': int(os.getenv(f'{prefix}_CONCURRENCY', str(concurrency))),
+        'latency_target_s': float(os.getenv(f'{prefix}_TARGET_MS', str(latency_target_ms))) / 1000.0,
+        # Starting service-time estimate; replaced by a moving average of observed durations
+        'service_s': float(os.getenv(f'{prefix}_SERVICE_MS', str(service_ms))) / 1000.0,
+    }
+
+
+ENDPOINT_CLASSES = {
+    # Whole-document NLP: LegalBERT / FLAN-T5 over every clause
+    'document': _class_config('document', 2, 15000, 5000),
+    # Tabular and short-text scoring: fraud and loan-risk models
+    'scoring': _class_config('scoring', 8, 2000, 200),
+    # Single FLAN-T5 generations
+    'generative': _class_config('generative', 2, 5000, 1500),
+}
+
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FairQueue:
+    """Per-user FIFO queues served round-robin, one item per user per turn."""
+
+    def __init__(self):
+        self._queues = OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def depth(self, uid):
+        queue = self._queues.get(uid)
+        return len(queue) if queue else 0
+
+    def ahead_of_new(self, uid):
+        """Items that would be served before a new item from uid under round-robin."""
+        turn = self.depth(uid) + 1
+        return sum(min(len(queue), turn) for other, queue in self._queues.items() if other != uid) + turn - 1
+
+    def push(self, uid, item):
+        self._queues.setdefault(uid, deque()).append(item)
+        self._size += 1
+
+    def pop(self):
+        uid, queue = next(iter(self._queues.items()))
+        item = queue.popleft()
+        # The user moves to the back of the rotation
+        del self._queues[uid]
+        if queue:
+            self._queues[uid] = queue
+        self._size -= 1
+        return item
+
+    def remove(self, uid, item):
+        queue = self._queues.get(uid)
+        if queue is None or item not in queue:
+            return False
+        queue.remove(item)
+        if not queue:
+            del self._queues[uid]
+        self._size -= 1
+        return True
+
+
+class AdmissionState:
+    """
+    Scheduling state of one endpoint class. Not thread-safe and has no clock of its own:
+    AdmissionController locks around it, and the load simulation drives it with virtual time.
+    """
+
+    def __init__(self, concurrency, latency_target_s, service_s, max_queued_per_user=ADMISSION_MAX_QUEUED_PER_USER):
+        self.concurrency = concurrency
+        self.latency_target_s = latency_target_s
+        self.service_s = service_s
+        self.max_queued_per_user = max_queued_per_user
+        self.in_flight = 0
+        self.queue = FairQueue()
+        self.admitted = 0
+        self.shed = 0
+
+    def estimate_wait(self, uid):
+        if self.in_flight < self.concurrency and not self.queue:
+            return 0.0
+        ahead = self.queue.ahead_of_new(uid) + max(0, self.in_flight - self.concurrency + 1)
+        return ahead * self.service_s / self.concurrency
+
+    def offer(self, uid, item):
+        """Returns ('run', 0), ('queued', estimated_wait) or ('shed', retry_after)."""
+        if self.in_flight < self.concurrency and not self.queue:
+            self.in_flight += 1
+            self.admitted += 1
+            return 'run', 0.0
+        wait = self.estimate_wait(uid)
+        if self.queue.depth(uid) >= self.max_queued_per_user or wait > self.latency_target_s:
+            self.shed += 1
+            return 'shed', max(wait - self.latency_target_s, self.service_s)
+        self.queue.push(uid, item)
+        self.admitted += 1
+        return 'queued', wait
+
+    def complete(self, elapsed_s=None):
+        """Release a slot; returns the queued item it is handed to, if any."""
+        if elapsed_s is not None:
+            self.service_s += SERVICE_TIME_ALPHA * (elapsed_s - self.service_s)
+        if self.queue:
+            return self.queue.pop()
+        self.in_flight -= 1
+        return None
+
+    def cancel(self, uid, item):
+        return self.queue.remove(uid, item)
+
+    def stats(self):
+        return {
+            'concurrency': self.concurrency,
+            'in_flight': self.in_flight,
+            'queued': len(self.queue),
+            'service_ms': round(self.service_s * 1000, 1),
+            'admitted': self.admitted,
+            'shed': self.shed,
+        }
+
+
+class _Waiter:
+    __slots__ = ('event', 'granted')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionController:
+    """Thread-safe admission for one endpoint class; blocks queued callers until a slot is handed to them."""
+
+    def __init__(self, name, concurrency, latency_target_s, service_s, max_queued_per_user=ADMISSION_MAX_QUEUED_PER_USER):
+        self.name = name
+        self._lock = threading.Lock()
+        self.state = AdmissionState(concurrency, latency_target_s, service_s, max_queued_per_user)
+
+    def acquire(self, uid):
+        waiter = _Waiter()
+        with self._lock:
+            decision, value = self.state.offer(uid, waiter)
+        if decision == 'run':
+            return
+        if decision == 'shed':
+            raise Overloaded(f'{self.name} endpoints are at capacity', value)
+        # Never wait past the latency target; the estimate can be wrong when service times shift
+        if waiter.event.wait(self.state.latency_target_s):
+            return
+        with self._lock:
+            if waiter.granted:
+                return
+            self.state.cancel(uid, waiter)
+            self.state.shed += 1
+        raise Overloaded(f'Timed out waiting for a {self.name} slot', self.state.service_s)
+
+    def release(self, elapsed_s):
+        with self._lock:
+            waiter = self.state.complete(elapsed_s)
+            if waiter is not None:
+                waiter.granted = True
+                waiter.event.set()
+
+    def stats(self):
+        with self._lock:
+            return self.state.stats()
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(endpoint_class):
+    with _controllers_lock:
+        controller = _controllers.get(endpoint_class)
+        if controller is None:
+            config = ENDPOINT_CLASSES[endpoint_class]
+            controller = _controllers[endpoint_class] = AdmissionController(endpoint_class, **config)
+        return controller
+
+
+def admission_stats():
+    return {name: get_controller(name).stats() for name in ENDPOINT_CLASSES}
+
+
+def _status_code(rv):
+    """Status of a view's return value: a Response, (body, status[, headers]), (body, headers) or a bare body."""
+    if isinstance(rv, tuple):
+        if len(rv) > 1 and isinstance(rv[1], int):
+            return rv[1]
+        rv = rv[0]
+    return getattr(rv, 'status_code', 200)
+
+
+def admission_controlled(endpoint_class):
+    """Route decorator; apply below verify_firebase_token so g.user is set."""
+    if endpoint_class not in ENDPOINT_CLASSES:
+        raise ValueError(f'Unknown endpoint class: {endpoint_class}')
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not ADMISSION_ENABLED:
+                return f(*args, **kwargs)
+            from flask import request, jsonify, g
+            uid = (getattr(g, 'user', None) or {}).get('uid') or request.remote_addr
+            controller = get_controller(endpoint_class)
+            try:
+                controller.acquire(uid)
+            except Overloaded as e:
+                retry_after = max(1, math.ceil(e.retry_after))
+                logging.warning(f'Shedding {request.path} for {uid}: {str(e)}')
+                response = jsonify({'error': f'Server busy: {str(e)}', 'retry_after': retry_after})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+            started = time.monotonic()
+            elapsed_s = None
+            try:
+                rv = f(*args, **kwargs)
+                # Only completed work feeds the service-time estimate; fast 4xx rejections and errors would drag it down
+                if 200 <= _status_code(rv) < 300:
+                    elapsed_s = time.monotonic() - started
+                return rv
+            finally:
+                controller.release(elapsed_s)
+        return decorated_function
+    return decorator
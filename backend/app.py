@@ -1,8 +1,7 @@
 from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 import firebase_admin
-from firebase_admin import credentials, auth as firebase_auth
-from functools import wraps
+from firebase_admin import credentials
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -19,10 +18,17 @@ CORS(app, resources={r"/api/*": {"origins": [
 
 logging.basicConfig(level=logging.INFO)
 
+# Opt-in sampling profiler (admin header or PROFILE_SAMPLE_RATE); no-op when disabled
+from profiling import init_profiling, PROFILE_HEADER
+init_profiling(app)
+
 @app.before_request
 def log_request_info():
     logging.info(f"Incoming {request.method} {request.path}")
-    logging.info(f"Headers: {dict(request.headers)}")
+    headers = dict(request.headers)
+    if PROFILE_HEADER in headers:
+        headers[PROFILE_HEADER] = '[redacted]'
+    logging.info(f"Headers: {headers}")
     if request.method in ["POST", "PUT", "PATCH"]:
         logging.info(f"Body: {request.get_data()}")
 
@@ -38,49 +44,187 @@ if not firebase_admin._apps:
     cred = credentials.Certificate(cred_path)
     firebase_admin.initialize_app(cred)
 
-def verify_firebase_token(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get('Authorization', None)
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({'error': 'Missing or invalid Authorization header'}), 401
-        id_token = auth_header.split('Bearer ')[-1]
-        try:
-            decoded_token = firebase_auth.verify_id_token(id_token)
-            g.user = decoded_token
-        except Exception as e:
-            return jsonify({'error': f'Invalid token: {str(e)}'}), 401
-        return f(*args, **kwargs)
-    return decorated_function
+from auth import verify_firebase_token
+# Per-endpoint-class concurrency limits, per-user fair queueing and 429 load shedding for model routes
+from admission import admission_controlled, admission_stats
 
 @app.route('/api/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'ok'})
+    return jsonify({'status': 'ok', 'admission': admission_stats()})
 
 # Analyze Compliance Endpoint
 from models import analyze_compliance, analyze_loan_risk, detect_fraud
+from persistence import get_result_store, COMPLIANCE_COLLECTION, REPORTS_COLLECTION, FRAUD_COLLECTION, LOAN_RISK_COLLECTION
+from dashboard_data import get_aggregates
+
+def save_compliance_check(result, document_name, document_type):
+    # Buffered write + O(1) dashboard update; a persistence failure must not fail the analysis itself.
+    # The dashboard counts every result that was queued (queued writes are retried, never dropped), so it agrees with a rebuild.
+    try:
+        get_result_store().add(COMPLIANCE_COLLECTION, {
+            'document_name': document_name,
+            'document_type': document_type,
+            'compliance_status': result.get('overallCompliance', 'Unknown'),
+            'user_uid': g.user.get('uid'),
+            'user_email': g.user.get('email'),
+            'result': result
+        })
+    except Exception:
+        logging.exception('Failed to persist compliance check')
+        return
+    get_aggregates().record_compliance(result)
+
+def save_loan_risk_result(result, model):
+    if not isinstance(result, dict) or 'error' in result:
+        return
+    risk_level = result.get('risk_level') or result.get('riskLevel')
+    if risk_level is None and result.get('creditworthy') is not None:
+        risk_level = 'Low' if result['creditworthy'] else 'High'
+    try:
+        get_result_store().add(LOAN_RISK_COLLECTION, {
+            'risk_level': risk_level,
+            'risk_score': result.get('risk_score'),
+            'model': model,
+            'user_uid': g.user.get('uid')
+        })
+    except Exception:
+        logging.exception('Failed to persist loan risk result')
+        return
+    get_aggregates().record_loan_risk(risk_level)
+
+def save_fraud_result(resp):
+    try:
+        get_result_store().add(FRAUD_COLLECTION, {
+            'fraud_risk': resp['fraudRisk'],
+            'fraud_score': resp['fraudScore'],
+            'user_uid': g.user.get('uid')
+        })
+    except Exception:
+        logging.exception('Failed to persist fraud result')
+        return
+    get_aggregates().record_fraud(resp['fraudRisk'])
+
+# Optional per-request override of SUGGESTION_MODE: "deferred" or "eager"
+def _defer_suggestions(mode):
+    return None if not mode else mode == 'deferred'
 
 @app.route('/api/analyze-compliance', methods=['POST'])
 @verify_firebase_token
+@admission_controlled('document')
 def analyze_compliance_route():
     data = request.get_json()
     if not data or 'document_text' not in data:
         return jsonify({'error': 'Missing document_text'}), 400
     try:
-        result = analyze_compliance(data['document_text'])
+        result = analyze_compliance(data['document_text'], _defer_suggestions(data.get('suggestions')))
+        save_compliance_check(result, data.get('document_name'), data.get('document_type', 'text/plain'))
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': f'Compliance analysis failed: {str(e)}'}), 500
+
+# Multipart upload: the file is spooled server-side and analyzed page by page as text is extracted
+from models import analyze_clause_stream, SUMMARY_MAX_CHARS
+from clause_engine import iter_indexed_clauses
+from ingestion import ingest_upload, IngestionError, INGEST_MAX_BYTES
+
+@app.route('/api/analyze-compliance-upload', methods=['POST'])
+@verify_firebase_token
+@admission_controlled('document')
+def analyze_compliance_upload_route():
+    if request.content_length and request.content_length > INGEST_MAX_BYTES + 64 * 1024:
+        return jsonify({'error': f'Upload exceeds the {INGEST_MAX_BYTES} byte limit'}), 413
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'Missing file'}), 400
+    try:
+        result, document = ingest_upload(
+            upload,
+            lambda lines, summary_text: analyze_clause_stream(
+                iter_indexed_clauses(lines), summary_text, _defer_suggestions(request.form.get('suggestions'))),
+            SUMMARY_MAX_CHARS,
+        )
+        result['document'] = document
+        save_compliance_check(result, document['document_name'], document['document_type'])
         return jsonify(result)
+    except IngestionError as e:
+        return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         return jsonify({'error': f'Compliance analysis failed: {str(e)}'}), 500
 
+# Rewrites for clauses returned with a suggestion_id; body: {"clauses": [{"suggestion_id": ..., "text": ...}]}
+from suggestions import generate_suggestions, suggestion_id, SUGGESTION_MAX_REQUEST
+
+def _suggestion_status(generated, key):
+    if key not in generated:
+        return 'pending'
+    return 'ready' if generated[key] else 'error'
+
+@app.route('/api/clause-suggestions', methods=['POST'])
+@verify_firebase_token
+@admission_controlled('generative')
+def clause_suggestions_route():
+    data = request.get_json() or {}
+    clauses = data.get('clauses')
+    if not isinstance(clauses, list) or not clauses:
+        return jsonify({'error': 'Missing clauses'}), 400
+    if len(clauses) > SUGGESTION_MAX_REQUEST:
+        return jsonify({'error': f'At most {SUGGESTION_MAX_REQUEST} clauses per request'}), 400
+    for clause in clauses:
+        # The id is a hash of the text, so a client cannot attach a rewrite to a different clause
+        if not isinstance(clause, dict) or not clause.get('text') or clause.get('suggestion_id') != suggestion_id(clause['text']):
+            return jsonify({'error': 'Each clause needs its text and the suggestion_id returned by the analysis'}), 400
+    try:
+        generated = generate_suggestions([clause['text'] for clause in clauses])
+    except Exception as e:
+        logging.exception('Error generating clause suggestions')
+        return jsonify({'error': f'Suggestion generation failed: {str(e)}'}), 500
+    # A clause another request is still generating comes back pending and the client asks again;
+    # a generation that finished without a rewrite is an error, so the client stops asking
+    return jsonify({'suggestions': [
+        {
+            'suggestion_id': clause['suggestion_id'],
+            'suggestion': generated.get(clause['suggestion_id']),
+            'suggestion_status': _suggestion_status(generated, clause['suggestion_id']),
+        }
+        for clause in clauses
+    ]})
+
+# Paginated history: ?limit=N&cursor=<next_cursor from the previous page>
+def _history_response(collection):
+    try:
+        page = get_result_store().history(
+            collection, g.user.get('uid'),
+            limit=request.args.get('limit', 10, type=int),
+            cursor=request.args.get('cursor')
+        )
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.exception('Error reading history')
+        return jsonify({'error': f'Failed to load history: {str(e)}'}), 500
+
+@app.route('/api/compliance-history', methods=['GET'])
+@verify_firebase_token
+def compliance_history():
+    return _history_response(COMPLIANCE_COLLECTION)
+
+@app.route('/api/reports', methods=['GET'])
+@verify_firebase_token
+def report_history():
+    return _history_response(REPORTS_COLLECTION)
+
 # Analyze Loan Risk Endpoint
 @app.route('/api/analyze-loan-risk', methods=['POST'])
 @verify_firebase_token
+@admission_controlled('scoring')
 def analyze_loan_risk_route():
     data = request.get_json()
     if not data:
         return jsonify({'error': 'Missing input data'}), 400
     try:
         result = analyze_loan_risk(data)
+        save_loan_risk_result(result, 'heuristic')
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': f'Loan risk analysis failed: {str(e)}'}), 500
@@ -88,6 +232,7 @@ def analyze_loan_risk_route():
 # Detect Fraud Endpoint
 @app.route('/api/detect-fraud', methods=['POST'])
 @verify_firebase_token
+@admission_controlled('document')
 def detect_fraud_route():
     data = request.get_json()
     if not data or 'document_text' not in data:
@@ -107,9 +252,11 @@ def protected():
 # --- Advanced ML Endpoints (do not touch existing endpoints) ---
 from models_risk_fraud import score_loan_risk_tabular, score_loan_risk_hf_saifhmb, predict_loan_risk_flan_t5
 from models_fraud import detect_fraud_advanced, detect_fraud_finchain_bert
+from velocity import observe_application, velocity_anomalies
 
 @app.route('/api/detect-fraud-finchain', methods=['POST'])
 @verify_firebase_token
+@admission_controlled('document')
 def detect_fraud_finchain():
     data = request.get_json()
     if not data or 'document_text' not in data:
@@ -122,10 +269,12 @@ def detect_fraud_finchain():
 
 @app.post('/api/score-loan-risk-ml')
 @verify_firebase_token
+@admission_controlled('scoring')
 def score_loan_risk_ml():
     try:
         data = request.json
         result = score_loan_risk_tabular(data)
+        save_loan_risk_result(result, 'tabular')
         return jsonify(result)
     except Exception as e:
         logging.exception('Error in score_loan_risk_ml')
@@ -133,10 +282,12 @@ def score_loan_risk_ml():
 
 @app.post('/api/score-loan-risk-flan')
 @verify_firebase_token
+@admission_controlled('generative')
 def score_loan_risk_flan():
     try:
         data = request.json
         result = predict_loan_risk_flan_t5(data)
+        save_loan_risk_result(result, 'flan')
         return jsonify(result)
     except Exception as e:
         logging.exception('Error in score_loan_risk_flan')
@@ -144,10 +295,12 @@ def score_loan_risk_flan():
 
 @app.post('/api/score-loan-risk-hf')
 @verify_firebase_token
+@admission_controlled('scoring')
 def score_loan_risk_hf():
     try:
         data = request.json
         result = score_loan_risk_hf_saifhmb(data)
+        save_loan_risk_result(result, 'hf')
         return jsonify(result)
     except Exception as e:
         logging.exception('Error in score_loan_risk_hf')
@@ -155,13 +308,17 @@ def score_loan_risk_hf():
 
 @app.post('/api/detect-fraud-advanced')
 @verify_firebase_token
+@admission_controlled('scoring')
 def detect_fraud_adv():
+    velocity = None
     try:
         data = request.json or {}
         tabular = data.get('tabular', {})
         text = data.get('text', {})
+        # Sliding-window counters per applicant / device / IP, updated with this application
+        velocity = observe_application(tabular)
         # Try real detection
-        result = detect_fraud_advanced(tabular, text)
+        result = detect_fraud_advanced(tabular, text, velocity)
         import datetime
         now = datetime.datetime.now().isoformat()
         # Dynamic fraud risk logic
@@ -213,16 +370,21 @@ def detect_fraud_adv():
                 fraudScore = 62
                 recommendations = ['Monitor account activity']
         else:
-            # Fallback demo
             fraudRisk = 'Medium'
             fraudScore = 62
-            anomalies = [
-                {'type': 'Unusual Login Pattern', 'description': 'Multiple logins from different locations in short time.', 'impact': 'Medium'}
-            ]
             recommendations = [
                 'Monitor account activity',
                 'Escalate to compliance team'
             ]
+        velocity_flags = velocity_anomalies(velocity)
+        anomalies.extend(velocity_flags)
+        if velocity_flags and fraudRisk == 'Low':
+            fraudRisk = 'Medium'
+            fraudScore = max(fraudScore, 62)
+            recommendations = ['Monitor account activity', 'Escalate to compliance team']
+        if any(a['impact'] == 'High' for a in velocity_flags):
+            fraudRisk = 'High'
+            fraudScore = max(fraudScore, 80)
         # Compose response
         resp = {
             'fraudRisk': fraudRisk,
@@ -230,12 +392,14 @@ def detect_fraud_adv():
             'lastChecked': now,
             'anomalies': anomalies,
             'recommendations': recommendations,
+            'velocity': velocity,
             'finchain': {
                 'fraud_label': 'FRAUD',
                 'fraud_probability': 0.91,
                 'explanation': 'FinBERT detected high likelihood of fraudulent intent in application text.'
             }
         }
+        save_fraud_result(resp)
         return jsonify(resp)
     except Exception as e:
         logging.exception('Error in detect_fraud_adv')
@@ -246,9 +410,7 @@ def detect_fraud_adv():
             'fraudRisk': 'Medium',
             'fraudScore': 62,
             'lastChecked': now,
-            'anomalies': [
-                {'type': 'Unusual Login Pattern', 'description': 'Multiple logins from different locations in short time.', 'impact': 'Medium'}
-            ],
+            'anomalies': velocity_anomalies(velocity) if velocity else [],
             'recommendations': [
                 'Monitor account activity',
                 'Escalate to compliance team'
@@ -271,6 +433,10 @@ def dashboard_summary():
 from reporting_api import reporting_api
 app.register_blueprint(reporting_api)
 
+# Models load on first use; PRELOAD_MODELS warms them in the background instead
+from preload import start_preload
+start_preload()
+
 if __name__ == '__main__':
     logging.info('Starting Flask backend on port 5001')
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,58 @@
+"""
+Scaling benchmark for clause segmentation + RBI rule matching.
+Time per character should stay flat as documents grow (linear-time scaling).
+
+Usage (from backend/):
+    python -m benchmarks.bench_clause_engine --out clause_engine_bench.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import generate_contract
+from clause_engine import index_clauses, get_rule_index
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Clause engine scaling benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='clauses per document')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', default='clause_engine_bench.json')
+    args = parser.parse_args(argv)
+
+    get_rule_index()  # compile the automaton outside the timed region
+    rows = []
+    for size in args.sizes:
+        doc = generate_contract(size, seed=size)
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            clauses = index_clauses(doc)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        row = {
+            'clauses': size,
+            'chars': len(doc),
+            'segments': len(clauses),
+            'seconds': best,
+            'ns_per_char': best * 1e9 / len(doc),
+        }
+        rows.append(row)
+        print(f"{size:>7} clauses {len(doc):>10} chars: {best * 1000:9.1f}ms  {row['ns_per_char']:.1f}ns/char")
+
+    # Ratio of per-character cost between the largest and smallest document; ~1.0 means linear
+    scaling = rows[-1]['ns_per_char'] / rows[0]['ns_per_char'] if rows else None
+    print(f'per-char cost ratio (largest/smallest): {scaling:.2f}')
+    with open(args.out, 'w') as f:
+        json.dump({'rows': rows, 'per_char_cost_ratio': scaling}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Near-duplicate clause index benchmark: hit rate and lookup latency at a large index size.
+
+Builds an on-disk index of --size synthetic clauses, reopens it from disk, then queries
+  near-duplicates   stored clauses with a small edit (renumbering, one word changed, punctuation, case)
+  novel clauses     freshly generated clauses whose exact text was never stored
+and reports hit rates, lookup latency percentiles, build/reload time and in-memory index size.
+
+Usage (from backend/):
+    python -m benchmarks.bench_clause_index --size 1000000 --out clause_index_bench.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generators import generate_clause
+from clause_index import ClauseIndex
+
+_SUBSTITUTES = {'shall': 'must', 'may': 'can', 'days': 'calendar days', 'the Lender': 'the lender'}
+
+
+EDITS = ('renumbered', 'word_changed', 'punctuation', 'case')
+
+
+def near_duplicate(text, rng):
+    """(edit, text) with a small edit of the kind seen between agreements from the same lender."""
+    edit = rng.choice(EDITS)
+    if edit == 'renumbered':
+        return edit, f'{rng.randint(1, 40)}.{rng.randint(1, 9)} {text}'
+    if edit == 'word_changed':
+        for old, new in _SUBSTITUTES.items():
+            if old in text:
+                return edit, text.replace(old, new, 1)
+        return edit, text + ' Applicable.'
+    if edit == 'punctuation':
+        return edit, text.replace(';', ',').rstrip('.')
+    return edit, text.upper()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+
+def timed_lookups(index, texts):
+    latencies, hits = [], 0
+    for text in texts:
+        started = time.perf_counter()
+        record, _ = index.lookup(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += record is not None
+    return {
+        'queries': len(texts),
+        'hit_rate': round(hits / len(texts), 4),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Near-duplicate clause index benchmark')
+    parser.add_argument('--size', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=10000, help='clauses per insert_many call while building')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='clause_index_bench.json')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='clause-index-bench-')
+    try:
+        index = ClauseIndex(workdir)
+        started = time.perf_counter()
+        for start in range(0, args.size, args.batch):
+            texts = [generate_clause(args.seed * 10000019 + i) for i in range(start, min(start + args.batch, args.size))]
+            index.insert_many(texts, [{'status': 'non-compliant', 'confidence': 0.9, 'suggestion': None}] * len(texts))
+        build_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = ClauseIndex(workdir)
+        reload_s = time.perf_counter() - started
+
+        rng = random.Random(args.seed + 1)
+        stored_ids = [rng.randrange(args.size) for _ in range(args.queries)]
+        edited = [near_duplicate(generate_clause(args.seed * 10000019 + i), rng) for i in stored_ids]
+        near = [text for _, text in edited]
+        stored_texts = {generate_clause(args.seed * 10000019 + i) for i in stored_ids}
+        novel = []
+        seed = args.seed * 10000019 + args.size
+        while len(novel) < args.queries:
+            text = generate_clause(seed)
+            seed += 1
+            if text not in stored_texts:
+                novel.append(text)
+
+        disk_bytes = sum(os.path.getsize(os.path.join(workdir, f)) for f in os.listdir(workdir))
+        memory_bytes = index._signatures.nbytes + index._offsets.nbytes + index._sorted_keys.nbytes + index._sorted_ids.nbytes
+        results = {
+            'size': len(index),
+            'build_s': round(build_s, 2),
+            'reload_s': round(reload_s, 2),
+            'disk_mb': round(disk_bytes / 2 ** 20, 1),
+            'memory_mb': round(memory_bytes / 2 ** 20, 1),
+            'near_duplicates': timed_lookups(index, near),
+            'novel': timed_lookups(index, novel),
+            # One changed word moves several shingles, so short clauses drop below the threshold by design
+            'near_duplicates_by_edit': {
+                edit: timed_lookups(index, [text for e, text in edited if e == edit])['hit_rate'] for edit in EDITS
+            },
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{results['size']} clauses: build {results['build_s']}s, reload {results['reload_s']}s, "
+          f"{results['memory_mb']} MB in memory, {results['disk_mb']} MB on disk")
+    for kind in ('near_duplicates', 'novel'):
+        r = results[kind]
+        print(f"  {kind:<16} hit rate {r['hit_rate']:.2%}  p50 {r['p50_ms']:.3f}ms  p99 {r['p99_ms']:.3f}ms")
+    print('  near-duplicate hit rate by edit: ' + ', '.join(f'{e} {r:.0%}' for e, r in results['near_duplicates_by_edit'].items()))
+    print('  (novel hits are clauses whose generated wording is itself a near-duplicate of a stored clause)')
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
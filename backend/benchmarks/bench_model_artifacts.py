@@ -0,0 +1,107 @@
+"""
+Load-time and memory benchmark: joblib pickle vs memory-mapped artifact for a 500-tree IsolationForest.
+
+Each loader runs in a fresh subprocess and reports load time, RSS growth and private (unshared)
+memory growth from /proc/self/smaps_rollup. Private memory is what every extra worker pays again.
+
+Usage (from backend/):
+    python -m benchmarks.bench_model_artifacts --trees 500 --out model_artifacts_bench.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_CHILD = r'''
+import json, sys, time
+sys.path.insert(0, {backend!r})
+
+def mem_kb():
+    stats = {{}}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                stats[parts[0].rstrip(':')] = int(parts[1])
+    return stats.get('Rss', 0), stats.get('Private_Clean', 0) + stats.get('Private_Dirty', 0)
+
+import numpy as np
+from benchmarks.generators import synthetic_applicant_matrix
+X = np.asarray(synthetic_applicant_matrix(256, seed=7), dtype=float)
+if {kind!r} == 'pickle':
+    import joblib, sklearn.ensemble
+else:
+    import model_artifacts
+rss0, priv0 = mem_kb()
+started = time.perf_counter()
+if {kind!r} == 'pickle':
+    model = joblib.load({path!r})
+else:
+    model = model_artifacts.load_artifact({path!r})
+load_s = time.perf_counter() - started
+rss1, priv1 = mem_kb()
+started = time.perf_counter()
+scores = model.decision_function(X)
+score_s = time.perf_counter() - started
+rss2, priv2 = mem_kb()
+print(json.dumps({{
+    'load_ms': load_s * 1000, 'score_256_ms': score_s * 1000,
+    'rss_after_load_kb': rss1 - rss0, 'private_after_load_kb': priv1 - priv0,
+    'rss_after_score_kb': rss2 - rss0, 'private_after_score_kb': priv2 - priv0,
+    'scores': [float(s) for s in scores[:16]],
+}}))
+'''
+
+
+def run_child(kind, path):
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = _CHILD.format(backend=backend, kind=kind, path=path)
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True, cwd=backend)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Model artifact load benchmark')
+    parser.add_argument('--trees', type=int, default=500)
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--out', default='model_artifacts_bench.json')
+    args = parser.parse_args(argv)
+
+    import joblib
+    import numpy as np
+    from benchmarks.stubs import fit_isolation_forest
+    from benchmarks.generators import FRAUD_FEATURES
+    from model_artifacts import export_model
+
+    workdir = tempfile.mkdtemp(prefix='artifact-bench-')
+    forest = fit_isolation_forest(n_samples=args.samples, n_estimators=args.trees)
+    pickle_path = os.path.join(workdir, 'forest.pkl')
+    artifact_path = os.path.join(workdir, 'forest.artifact')
+    joblib.dump(forest, pickle_path)
+    manifest = export_model(forest, artifact_path, FRAUD_FEATURES)
+
+    results = {
+        'trees': args.trees,
+        'nodes': manifest['n_nodes'],
+        'pickle_bytes': os.path.getsize(pickle_path),
+        'pickle': run_child('pickle', pickle_path),
+        'artifact': run_child('artifact', artifact_path),
+    }
+    pickled, mapped = results['pickle'].pop('scores'), results['artifact'].pop('scores')
+    results['max_score_diff'] = float(np.max(np.abs(np.asarray(pickled) - np.asarray(mapped))))
+    for kind in ('pickle', 'artifact'):
+        r = results[kind]
+        print(f"{kind:>8}: load {r['load_ms']:8.1f}ms  private +{r['private_after_load_kb']:>8}kB  "
+              f"rss +{r['rss_after_load_kb']:>8}kB  score(256) {r['score_256_ms']:.1f}ms")
+    print(f"max |score difference| = {results['max_score_diff']:.2e}")
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Seeded generators for benchmark inputs: loan contracts, application texts and applicant records.
+"""
+import io
+import random
+
+FRAUD_FEATURES = ['age', 'income', 'credit_score', 'existing_loans', 'loan_amount']
+
+_CLAUSE_TEMPLATES = [
+    "The Borrower shall repay the loan in {n} equated monthly instalments of Rs. {amount}.",
+    "A penalty of {pct}% per month shall be levied on any overdue amount.",
+    "The Lender may disclose the Borrower's data to third parties for recovery purposes.",
+    "The Annual Percentage Rate of {pct}% is inclusive of all fees and charges.",
+    "The Borrower may prepay the loan at any time without any foreclosure charges.",
+    "Recovery agents may contact the Borrower's references between 8 AM and 7 PM.",
+    "The Key Fact Statement has been provided to the Borrower before execution of this agreement.",
+    "The Lender reserves the right to change the interest rate without prior notice.",
+]
+
+_APPLICATION_SENTENCES = [
+    "I am applying for a personal loan to cover medical expenses.",
+    "My salary is credited on the first of every month.",
+    "I have been working with my current employer for {n} years.",
+    "Please process urgently, I need the money today.",
+    "I have no other outstanding loans.",
+    "The amount will be used to expand my small business.",
+]
+
+
+def generate_contract(n_clauses, seed=0):
+    rng = random.Random(seed)
+    clauses = []
+    for i in range(n_clauses):
+        body = rng.choice(_CLAUSE_TEMPLATES).format(
+            n=rng.randint(6, 60), amount=rng.randint(1000, 90000), pct=rng.randint(1, 36))
+        clauses.append(f"Clause {i + 1}\n{body}")
+    return "\n\n".join(clauses)
+
+
+_CLAUSE_PARTIES = ['the Borrower', 'the Lender', 'the Co-Borrower', 'the Guarantor', 'the Regulated Entity', 'the Lending Service Provider']
+_CLAUSE_VERBS = ['shall', 'may', 'shall not', 'is entitled to', 'agrees to', 'undertakes to']
+_CLAUSE_ACTIONS = [
+    'repay the outstanding principal', 'pay interest at the agreed rate', 'furnish updated income documents',
+    'notify any change of address', 'levy a processing fee', 'share credit information with bureaus',
+    'appoint a recovery agent', 'disclose the annual percentage rate', 'charge a foreclosure fee',
+    'restructure the repayment schedule', 'assign the receivables', 'maintain the escrow account',
+]
+_CLAUSE_CONDITIONS = [
+    'within {n} days of the due date', 'after giving {n} days written notice', 'subject to a cap of Rs. {amount}',
+    'at {pct}% per annum', 'for a period of {n} months', 'unless waived in writing by the Lender',
+    'in accordance with the RBI Digital Lending Directions', 'through the registered mobile number',
+]
+
+
+def generate_clause(seed=0):
+    """One synthetic clause; distinct seeds give (almost always) distinct wording."""
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(rng.randint(1, 3)):
+        condition = rng.choice(_CLAUSE_CONDITIONS).format(
+            n=rng.randint(1, 90), amount=rng.randint(1000, 500000), pct=rng.randint(1, 36))
+        parts.append(f"{rng.choice(_CLAUSE_PARTIES)} {rng.choice(_CLAUSE_VERBS)} {rng.choice(_CLAUSE_ACTIONS)} {condition}")
+    text = '; '.join(parts)
+    return text[0].upper() + text[1:] + '.'
+
+
+def generate_application_text(n_sentences, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(_APPLICATION_SENTENCES).format(n=rng.randint(1, 15)) for _ in range(n_sentences))
+
+
+def generate_applicant(seed=0):
+    rng = random.Random(seed)
+    income = rng.randint(150000, 2500000)
+    return {
+        'age': rng.randint(21, 65),
+        'income': income,
+        'credit_score': rng.randint(450, 850),
+        'existing_loans': rng.randint(0, 4),
+        'loan_amount': rng.randint(50000, income * 3),
+        'employment': rng.choice(['Salaried', 'Self-Employed', 'Unemployed', 'Govt Job']),
+        'socials': rng.choice(['LinkedIn', 'None', 'Instagram', 'GitHub, LinkedIn']),
+        'purpose': rng.choice(['medical', 'education', 'business', 'travel']),
+        'amount_requested': rng.randint(50000, 1000000),
+    }
+
+
+def synthetic_applicant_matrix(n_samples, seed=0):
+    rows = []
+    for i in range(n_samples):
+        applicant = generate_applicant(seed * 1000003 + i)
+        rows.append([float(applicant[k]) for k in FRAUD_FEATURES])
+    return rows
+
+
+def synthetic_anomaly_matrix(n_samples, seed=0):
+    """
+    Applicant rows followed by velocity.VELOCITY_FEATURES (models_fraud.ANOMALY_FEATURES order). The velocity
+    columns come from replaying the applicants through a VelocityEngine, with small pools of repeat applicants,
+    devices and IPs so the counters take realistic values rather than all being 1.
+    """
+    from velocity import VelocityEngine, VELOCITY_FEATURES
+    rng = random.Random(seed)
+    engine = VelocityEngine(state_path=None)
+    now = 1_700_000_000.0
+    rows = []
+    for i in range(n_samples):
+        applicant = generate_applicant(seed * 1000003 + i)
+        velocity = engine.observe(
+            applicant=f'applicant-{rng.randint(0, max(1, n_samples // 4))}',
+            device=f'device-{rng.randint(0, max(1, n_samples // 3))}',
+            ip=f'ip-{rng.randint(0, max(1, n_samples // 5))}',
+            amount=applicant['loan_amount'],
+            location=f'city-{rng.randint(0, 20)}',
+            now=now,
+        )
+        now += rng.expovariate(1 / 30.0)
+        rows.append([float(applicant[k]) for k in FRAUD_FEATURES] + [float(velocity[k]) for k in VELOCITY_FEATURES])
+    return rows
+
+
+# Routes that take a multipart file upload rather than a JSON body
+MULTIPART_PATHS = {'/api/analyze-compliance-upload'}
+
+
+# Per-route request bodies; size scales the document / text / record count.
+# For MULTIPART_PATHS the body is form data with a (stream, filename, content_type) file entry.
+def payload_for(path, size, seed=0):
+    if path == '/api/analyze-compliance-upload':
+        contract = generate_contract(size, seed).encode('utf-8')
+        return {'file': (io.BytesIO(contract), f'contract-{seed}.txt', 'text/plain')}
+    if path in ('/api/analyze-compliance', '/api/detect-fraud', '/api/detect-fraud-finchain'):
+        return {'document_text': generate_contract(size, seed)}
+    if path == '/api/detect-fraud-advanced':
+        return {
+            'tabular': generate_applicant(seed),
+            'text': {'application_text': generate_application_text(size, seed)},
+        }
+    if path in ('/api/analyze-loan-risk', '/api/score-loan-risk-ml', '/api/score-loan-risk-flan', '/api/score-loan-risk-hf'):
+        return generate_applicant(seed)
+    if path == '/api/clause-suggestions':
+        from suggestions import suggestion_id, SUGGESTION_MAX_REQUEST
+        texts = [generate_clause(seed * 1000003 + i) for i in range(min(size, SUGGESTION_MAX_REQUEST))]
+        return {'clauses': [{'suggestion_id': suggestion_id(text), 'text': text} for text in texts]}
+    if path == '/api/generate-report':
+        return {'reportType': 'quarterly', 'reportPeriod': '2025-Q1', 'institutionName': 'Bench Bank'}
+    return {'document_text': generate_contract(size, seed)}
@@ -0,0 +1,84 @@
+"""
+Import-time report for the backend.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and attributes the
+cumulative import time to each backend module and third-party top-level package.
+
+Usage (from backend/):
+    python -m benchmarks.import_report            # import app
+    python -m benchmarks.import_report models --top 30 --out import_report.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """Yield (module, self_us, cumulative_us, depth) from -X importtime output."""
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        yield name.strip(), int(self_us), int(cumulative_us), depth
+
+
+def backend_modules():
+    return {os.path.splitext(f)[0] for f in os.listdir(BACKEND_DIR) if f.endswith('.py')}
+
+
+def build_report(target):
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    rows = list(parse_importtime(proc.stderr))
+    local = backend_modules()
+    modules = {}
+    packages = {}
+    for name, self_us, cumulative_us, depth in rows:
+        top = name.split('.')[0]
+        if name in local:
+            # Cumulative time of a backend module includes everything it pulled in
+            modules[name] = max(modules.get(name, 0), cumulative_us)
+        else:
+            packages[top] = packages.get(top, 0) + self_us
+    return {
+        'target': target,
+        'ok': proc.returncode == 0,
+        'error': proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        'total_ms': sum(c for n, _, c, d in rows if d == 0) / 1000.0 if rows else 0.0,  # top-level imports
+        'backend_modules_ms': {k: v / 1000.0 for k, v in sorted(modules.items(), key=lambda kv: -kv[1])},
+        'packages_self_ms': {k: v / 1000.0 for k, v in sorted(packages.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Backend import-time report')
+    parser.add_argument('target', nargs='?', default='app')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--out')
+    args = parser.parse_args(argv)
+
+    report = build_report(args.target)
+    if not report['ok']:
+        print(f"import {args.target} failed: {report['error']}")
+    print(f"import {args.target}: {report['total_ms']:.1f}ms total")
+    print('backend modules (cumulative):')
+    for name, ms in list(report['backend_modules_ms'].items())[:args.top]:
+        print(f'  {name:<28} {ms:9.1f}ms')
+    print('third-party packages (self time):')
+    for name, ms in list(report['packages_self_ms'].items())[:args.top]:
+        print(f'  {name:<28} {ms:9.1f}ms')
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if report['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Offline benchmark suite for every /api/* route in app.py.
+
+Runs against deterministic stub models (see benchmarks/stubs.py), so no network access or model
+downloads are needed. Results are throughput and latency percentiles per route, input size and
+concurrency level, written as JSON. Pass --baseline to fail on regressions.
+
+Latencies depend on the machine, so no baseline is committed: record one on the machine that will
+run the comparison (e.g. the CI runner), then compare later runs against it.
+
+Usage (from backend/):
+    python -m benchmarks.run --out bench_results.json
+    python -m benchmarks.run --out benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import stubs
+from benchmarks.generators import payload_for, MULTIPART_PATHS
+
+DEFAULT_SIZES = [1, 10, 50, 200]
+DEFAULT_CONCURRENCY = [1, 4, 16]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def api_routes(app):
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith('/api/') or rule.arguments:
+            continue
+        method = 'POST' if 'POST' in rule.methods else 'GET'
+        routes.append((rule.rule, method))
+    return sorted(set(routes))
+
+
+def run_case(app, path, method, size, concurrency, requests_per_case):
+    def one(i):
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer bench-user-{i % 8}'}
+        started = time.perf_counter()
+        if method == 'POST' and path in MULTIPART_PATHS:
+            resp = client.post(path, data=payload_for(path, size, seed=i), headers=headers,
+                               content_type='multipart/form-data')
+        elif method == 'POST':
+            resp = client.post(path, json=payload_for(path, size, seed=i), headers=headers)
+        else:
+            resp = client.get(path, headers=headers)
+        elapsed = time.perf_counter() - started
+        return elapsed, resp.status_code
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests_per_case)))
+    wall = time.perf_counter() - wall_start
+
+    # Rejections (4xx, 429 from admission control) are fast but not successes; keep them out of the percentiles
+    latencies = sorted(r[0] * 1000 for r in results if 200 <= r[1] < 300)
+    errors = sum(1 for r in results if not 200 <= r[1] < 300)
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'status_counts': {str(status): n for status, n in sorted(Counter(r[1] for r in results).items())},
+        'throughput_rps': len(results) / wall if wall else None,
+        'p50_ms': percentile(latencies, 50),
+        'p90_ms': percentile(latencies, 90),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': latencies[-1] if latencies else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against a stored baseline."""
+    regressions = []
+    for key, current in results['cases'].items():
+        previous = baseline.get('cases', {}).get(key)
+        if not previous:
+            continue
+        if previous.get('p99_ms') and current['p99_ms'] is not None and current['p99_ms'] > previous['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p99 {current['p99_ms']:.2f}ms > baseline {previous['p99_ms']:.2f}ms")
+        if previous.get('throughput_rps') and current['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {current['throughput_rps']:.1f}rps < baseline {previous['throughput_rps']:.1f}rps")
+        if current['errors'] > previous.get('errors', 0):
+            regressions.append(f"{key}: {current['errors']} errors (baseline {previous.get('errors', 0)})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline API benchmark with stub models')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--requests', type=int, default=32, help='requests per (route, size, concurrency) case')
+    parser.add_argument('--routes', nargs='*', help='only benchmark these paths')
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0, help='simulated per-call model latency')
+    parser.add_argument('--velocity-model', action='store_true',
+                        help='score fraud with an anomaly model trained on FRAUD_FEATURES + VELOCITY_FEATURES')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--baseline', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error(f'baseline {args.baseline} not found; record one first with --out {args.baseline}')
+
+    stubs.install(latency_ms=args.stub_latency_ms, velocity_model=args.velocity_model)
+    import logging
+    logging.disable(logging.INFO)
+    from app import app
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': args.sizes,
+            'concurrency': args.concurrency,
+            'requests_per_case': args.requests,
+            'stub_latency_ms': args.stub_latency_ms,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'cases': {},
+    }
+    for path, method in api_routes(app):
+        if args.routes and path not in args.routes:
+            continue
+        for size in args.sizes:
+            for concurrency in args.concurrency:
+                key = f'{method} {path} size={size} c={concurrency}'
+                case = run_case(app, path, method, size, concurrency, args.requests)
+                results['cases'][key] = case
+                if case['p50_ms'] is None:
+                    print(f"{key}: no successful requests, status {case['status_counts']}")
+                else:
+                    print(f"{key}: {case['throughput_rps']:.1f} rps, p50 {case['p50_ms']:.2f}ms, "
+                          f"p99 {case['p99_ms']:.2f}ms, errors {case['errors']}, status {case['status_counts']}")
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Wrote {args.out}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
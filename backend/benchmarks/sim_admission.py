@@ -0,0 +1,184 @@
+"""
+Deterministic load simulation for admission control (discrete-event, virtual clock, seeded workload).
+
+One bulk user submits a large contract every --bulk-interval seconds while light users send
+occasional small contracts and frequent fraud/loan-risk checks. The same worker budget is run twice:
+  baseline    one shared FIFO pool, no limits (the behaviour before admission control)
+  admission   admission.AdmissionState per endpoint class: per-class slots, per-user round-robin,
+              shedding above the latency target, queue timeouts at the target
+and latency percentiles are reported per user group. Exits non-zero if light-user p99 is unbounded.
+
+Usage (from backend/):
+    python -m benchmarks.sim_admission --out admission_sim.json
+"""
+import argparse
+import heapq
+import json
+import os
+import random
+import sys
+from collections import deque, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import AdmissionState, ADMISSION_MAX_QUEUED_PER_USER
+
+
+class FifoPool:
+    """Baseline: one shared pool of workers with an unbounded FIFO queue."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.in_flight = 0
+        self.queue = deque()
+
+    def offer(self, uid, item):
+        if self.in_flight < self.workers:
+            self.in_flight += 1
+            return 'run', 0.0
+        self.queue.append(item)
+        return 'queued', None
+
+    def complete(self, elapsed_s=None):
+        if self.queue:
+            return self.queue.popleft()
+        self.in_flight -= 1
+        return None
+
+    def cancel(self, uid, item):
+        return False
+
+
+def generate_workload(args):
+    """(arrival_s, group, uid, endpoint_class, service_s) tuples, identical for every run with the same seed."""
+    rng = random.Random(args.seed)
+    requests = []
+    t = 0.0
+    while t < args.duration:
+        requests.append((t, 'bulk', 'bulk-user', 'document', rng.uniform(6.0, 10.0)))
+        t += args.bulk_interval
+    for i in range(args.light_users):
+        uid = f'light-{i}'
+        t = rng.uniform(0, 10)
+        while t < args.duration:
+            requests.append((t, 'light_document', uid, 'document', rng.uniform(1.0, 3.0)))
+            t += rng.expovariate(1 / 20.0)
+        t = rng.uniform(0, 2)
+        while t < args.duration:
+            requests.append((t, 'light_scoring', uid, 'scoring', rng.uniform(0.1, 0.3)))
+            t += rng.expovariate(1 / 2.0)
+    requests.sort()
+    return requests
+
+
+def simulate(requests, policies, timeouts):
+    """Run the workload against policies[endpoint_class]; timeouts[endpoint_class] bounds queueing (None = unbounded)."""
+    events = []
+    seq = 0
+
+    def schedule(when, kind, req):
+        nonlocal seq
+        seq += 1
+        heapq.heappush(events, (when, seq, kind, req))
+
+    for i, (arrival, group, uid, endpoint_class, service) in enumerate(requests):
+        schedule(arrival, 'arrive', {'id': i, 'arrival': arrival, 'group': group, 'uid': uid,
+                                     'cls': endpoint_class, 'service': service, 'started': None})
+    results = defaultdict(lambda: {'latencies': [], 'shed': 0})
+
+    def start(req, now):
+        req['started'] = now
+        schedule(now + req['service'], 'finish', req)
+
+    while events:
+        now, _, kind, req = heapq.heappop(events)
+        policy = policies[req['cls']]
+        if kind == 'arrive':
+            decision, _ = policy.offer(req['uid'], req)
+            if decision == 'run':
+                start(req, now)
+            elif decision == 'shed':
+                results[req['group']]['shed'] += 1
+            elif timeouts[req['cls']] is not None:
+                schedule(now + timeouts[req['cls']], 'timeout', req)
+        elif kind == 'finish':
+            results[req['group']]['latencies'].append(now - req['arrival'])
+            nxt = policy.complete(req['service'])
+            if nxt is not None:
+                start(nxt, now)
+        elif kind == 'timeout' and req['started'] is None:
+            if policy.cancel(req['uid'], req):
+                policy.shed += 1
+                results[req['group']]['shed'] += 1
+    return results
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered) + 0.5)) - 1))]
+
+
+def summarize(results):
+    return {
+        group: {
+            'completed': len(r['latencies']),
+            'shed': r['shed'],
+            'p50_s': round(percentile(r['latencies'], 50) or 0, 3),
+            'p99_s': round(percentile(r['latencies'], 99) or 0, 3),
+            'max_s': round(max(r['latencies'], default=0), 3),
+        }
+        for group, r in sorted(results.items())
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Admission control load simulation')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--duration', type=float, default=600.0)
+    parser.add_argument('--bulk-interval', type=float, default=0.5)
+    parser.add_argument('--light-users', type=int, default=5)
+    parser.add_argument('--document-slots', type=int, default=2)
+    parser.add_argument('--scoring-slots', type=int, default=2)
+    parser.add_argument('--document-target', type=float, default=15.0)
+    parser.add_argument('--scoring-target', type=float, default=2.0)
+    parser.add_argument('--out', default='admission_sim.json')
+    args = parser.parse_args(argv)
+
+    requests = generate_workload(args)
+
+    shared = FifoPool(args.document_slots + args.scoring_slots)
+    baseline = simulate(requests, {'document': shared, 'scoring': shared}, {'document': None, 'scoring': None})
+
+    targets = {'document': args.document_target, 'scoring': args.scoring_target}
+    states = {
+        'document': AdmissionState(args.document_slots, args.document_target, 5.0, ADMISSION_MAX_QUEUED_PER_USER),
+        'scoring': AdmissionState(args.scoring_slots, args.scoring_target, 0.2, ADMISSION_MAX_QUEUED_PER_USER),
+    }
+    controlled = simulate(requests, states, targets)
+
+    report = {
+        'params': vars(args),
+        'requests': len(requests),
+        'baseline': summarize(baseline),
+        'admission': summarize(controlled),
+        'admission_stats': {name: state.stats() for name, state in states.items()},
+    }
+    # Light requests are bounded if they never wait much past their class's latency target
+    bounds = {'light_document': args.document_target + 3.0, 'light_scoring': args.scoring_target + 0.3}
+    report['light_p99_bounded'] = all(report['admission'][g]['p99_s'] <= b for g, b in bounds.items())
+
+    for mode in ('baseline', 'admission'):
+        print(mode)
+        for group, s in report[mode].items():
+            print(f"  {group:<15} completed {s['completed']:>6}  shed {s['shed']:>6}  "
+                  f"p50 {s['p50_s']:>9.2f}s  p99 {s['p99_s']:>9.2f}s  max {s['max_s']:>9.2f}s")
+    print(f"light-user p99 bounded: {report['light_p99_bounded']}")
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    return 0 if report['light_p99_bounded'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
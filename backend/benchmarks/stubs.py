@@ -0,0 +1,232 @@
+"""
+Deterministic offline stand-ins for everything the backend normally fetches over the network:
+HuggingFace pipelines, the HF Inference API, Firebase token verification, Firestore and the IsolationForest pickle.
+install() must run before app.py is imported.
+"""
+import time
+import zlib
+import tempfile
+
+STUB_LATENCY_S = 0.0
+
+
+def _stable_score(text):
+    # Same text -> same score on every run and every machine
+    return (zlib.crc32(str(text).encode('utf-8')) % 1000) / 1000.0
+
+
+def _simulate_cost(text):
+    if STUB_LATENCY_S:
+        # Scale with input so larger documents cost more, as with real models
+        time.sleep(STUB_LATENCY_S * (1 + len(str(text)) / 2000.0))
+
+
+class StubPipeline:
+    """Mimics the output shape of transformers.pipeline for the tasks used by the backend."""
+
+    def __init__(self, task, model=None, **kwargs):
+        self.task = task
+        self.model = model
+
+    def __call__(self, inputs, candidate_labels=None, **kwargs):
+        if isinstance(inputs, list):
+            return [self._one(x, candidate_labels) for x in inputs]
+        return self._one(inputs, candidate_labels)
+
+    def _one(self, text, candidate_labels=None):
+        _simulate_cost(text)
+        score = _stable_score(text)
+        if self.task == 'text-classification':
+            return [{'label': 'LABEL_1' if score >= 0.4 else 'LABEL_0', 'score': 0.5 + score / 2}]
+        if self.task == 'text2text-generation':
+            return [{'generated_text': f'The lender shall comply with RBI guidelines. ({len(text)} chars reviewed)'}]
+        if self.task == 'summarization':
+            return [{'summary_text': str(text)[:200]}]
+        if self.task == 'zero-shot-classification':
+            labels = list(candidate_labels or [])
+            scores = [1.0 / len(labels)] * len(labels) if labels else []
+            return {'sequence': text, 'labels': labels, 'scores': scores}
+        return [{'label': 'LABEL_0', 'score': score}]
+
+
+class _StubResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+def _stub_post(url, json=None, **kwargs):
+    _simulate_cost(json)
+    score = _stable_score(json)
+    if 'Credit-Card-Risk-Model' in url:
+        return _StubResponse({'creditworthy': score < 0.5, 'default_probability': score})
+    return _StubResponse({'score': score})
+
+
+def _stub_verify_id_token(id_token, *args, **kwargs):
+    return {'uid': id_token or 'bench-user', 'email': f'{id_token}@bench.local'}
+
+
+def fit_isolation_forest(n_samples=2000, n_estimators=100, seed=0, velocity=False):
+    """
+    Fit an IsolationForest on synthetic applicant records with the production feature order;
+    with velocity=True on FRAUD_FEATURES + VELOCITY_FEATURES (models_fraud.ANOMALY_FEATURES).
+    """
+    import numpy as np
+    from sklearn.ensemble import IsolationForest
+    from benchmarks.generators import FRAUD_FEATURES, synthetic_applicant_matrix, synthetic_anomaly_matrix
+    from velocity import VELOCITY_FEATURES
+    matrix = synthetic_anomaly_matrix if velocity else synthetic_applicant_matrix
+    X = np.asarray(matrix(n_samples, seed=seed), dtype=float)
+    assert X.shape[1] == len(FRAUD_FEATURES) + (len(VELOCITY_FEATURES) if velocity else 0)
+    return IsolationForest(n_estimators=n_estimators, random_state=seed).fit(X)
+
+
+def install(latency_ms=0.0, velocity_model=False):
+    """
+    Patch the heavy/networked dependencies with deterministic stubs. velocity_model=True installs an
+    anomaly model trained with the velocity features, as a retrained production model would be.
+    """
+    global STUB_LATENCY_S
+    STUB_LATENCY_S = latency_ms / 1000.0
+
+    import transformers
+    transformers.pipeline = StubPipeline
+
+    import requests
+    requests.post = _stub_post
+
+    import firebase_admin
+    from firebase_admin import auth as firebase_auth
+    firebase_admin._apps.setdefault('[DEFAULT]', object())
+    firebase_auth.verify_id_token = _stub_verify_id_token
+
+    import persistence
+    persistence._result_store = persistence.ResultStore(client=FakeFirestore())
+    import dashboard_data
+    dashboard_data._aggregates = dashboard_data.DashboardAggregates(state_path=None)
+    import reporting_api
+    reporting_api.REPORT_CACHE_DIR = tempfile.mkdtemp(prefix='bench-report-cache-')
+    # Repeated payloads would otherwise be served from the near-duplicate index
+    import clause_index
+    clause_index.CLAUSE_INDEX_ENABLED = False
+    import velocity
+    velocity._engine = velocity.VelocityEngine(state_path=None)
+
+    forest = fit_isolation_forest()
+    import models_fraud
+    import models_risk_fraud
+    # models_risk_fraud loads its forest with expected_features=FRAUD_FEATURES, so only models_fraud gets the velocity model
+    models_fraud._isolation_forest = fit_isolation_forest(velocity=True) if velocity_model else forest
+    models_risk_fraud._isolation_forest = forest
+
+
+_FILTER_OPS = {
+    '==': lambda a, b: a == b,
+    '<': lambda a, b: a is not None and a < b,
+    '<=': lambda a, b: a is not None and a <= b,
+    '>': lambda a, b: a is not None and a > b,
+    '>=': lambda a, b: a is not None and a >= b,
+}
+
+
+class _FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _FakeDocument:
+    def __init__(self, store, collection, doc_id):
+        self._store = store
+        self._collection = collection
+        self.id = doc_id
+
+
+class _FakeQuery:
+    def __init__(self, store, collection, filters=(), order=(), after=None, limit=None):
+        self._store, self._collection = store, collection
+        self._filters, self._order, self._after, self._limit = filters, order, after, limit
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, order=self._order, after=self._after, limit=self._limit)
+        state.update(changes)
+        return _FakeQuery(self._store, self._collection, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field, direction='ASCENDING'):
+        return self._copy(order=self._order + ((field, direction == 'DESCENDING'),))
+
+    def start_after(self, values):
+        return self._copy(after=values)
+
+    def limit(self, n):
+        return self._copy(limit=n)
+
+    @staticmethod
+    def _value(doc_id, data, field):
+        return doc_id if field == '__name__' else data.get(field)
+
+    def _compare(self, doc_id, data, values):
+        """-1/0/1 for the document against cursor values, in query order (directions applied)."""
+        for field, descending in self._order:
+            a, b = self._value(doc_id, data, field), values[field]
+            if a != b:
+                return (1 if a > b else -1) * (-1 if descending else 1)
+        return 0
+
+    def stream(self):
+        docs = [(i, d) for i, d in self._store.get(self._collection, {}).items()
+                if all(_FILTER_OPS[op](d.get(f), v) for f, op, v in self._filters)]
+        # Stable sorts from the last key to the first give a multi-key order with per-key directions
+        for field, descending in reversed(self._order):
+            docs.sort(key=lambda item: self._value(item[0], item[1], field), reverse=descending)
+        if self._after is not None:
+            docs = [item for item in docs if self._compare(item[0], item[1], self._after) > 0]
+        for doc_id, data in docs[:self._limit]:
+            yield _FakeSnapshot(doc_id, data)
+
+
+class _FakeCollection(_FakeQuery):
+    def __init__(self, store, collection):
+        super().__init__(store, collection)
+
+    def document(self, doc_id=None):
+        self._store['_seq'] = self._store.get('_seq', 0) + 1
+        return _FakeDocument(self._store, self._collection, doc_id or f'doc{self._store["_seq"]}')
+
+
+class _FakeBatch:
+    def __init__(self, store):
+        self._store = store
+        self._writes = []
+
+    def set(self, ref, data):
+        self._writes.append((ref, data))
+
+    def commit(self):
+        for ref, data in self._writes:
+            self._store.setdefault(ref._collection, {})[ref.id] = dict(data)
+
+
+class FakeFirestore:
+    """In-memory stand-in for the subset of the Firestore client used by persistence.ResultStore."""
+
+    def __init__(self):
+        self._store = {}
+
+    def collection(self, name):
+        return _FakeCollection(self._store, name)
+
+    def batch(self):
+        return _FakeBatch(self._store)
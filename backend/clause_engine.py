@@ -0,0 +1,317 @@
+import os
+import re
+import json
+from collections import deque
+from functools import lru_cache
+
+# --- Clause segmentation and RBI rule matching ---
+# Segmentation is a single pass over lines; rule matching is one Aho-Corasick pass per clause,
+# so the whole document is processed in time linear in its length.
+
+DEFAULT_RULE = "General RBI Guidelines for Digital Lending"
+RULES_PATH = os.getenv('RBI_RULES_PATH')
+
+# Catalogue of RBI circulars and the keywords that make a clause relevant to them.
+# Override with a JSON file at RBI_RULES_PATH: [{"id": ..., "title": ..., "keywords": [...]}, ...]
+DEFAULT_RULES = [
+    {
+        'id': 'penalty',
+        'title': "RBI/2022-23/45 - Penalty and Late Payment Guidelines",
+        'keywords': ['penalty', 'penalties', 'penal', 'late payment', 'overdue', 'default interest', 'bounce charge'],
+    },
+    {
+        'id': 'penal-charges',
+        'title': "RBI/2023-24/53 - Penal Charges in Loan Accounts",
+        'keywords': ['penal interest', 'penal charges', 'compounding of penal', 'capitalisation of penal'],
+    },
+    {
+        'id': 'kfs',
+        'title': "RBI/2024-25/18 - Key Facts Statement for Loans & Advances",
+        'keywords': ['key fact statement', 'key facts statement', 'kfs', 'annual percentage rate', 'apr', 'all-inclusive cost'],
+    },
+    {
+        'id': 'digital-lending',
+        'title': "RBI/2022-23/111 - Guidelines on Digital Lending",
+        'keywords': ['digital lending', 'lending service provider', 'lsp', 'loan app', 'mobile application', 'disbursement'],
+    },
+    {
+        'id': 'data-privacy',
+        'title': "RBI Digital Lending Guidelines - Data Collection, Privacy and Consent",
+        'keywords': ['personal data', 'third party', 'third parties', 'disclose', 'contact list', 'phone contacts', 'consent', 'biometric'],
+    },
+    {
+        'id': 'recovery',
+        'title': "RBI Fair Practices Code - Recovery Agents and Collection Practices",
+        'keywords': ['recovery agent', 'recovery agents', 'recovery', 'collection agent', 'harass', 'references', 'repossess'],
+    },
+    {
+        'id': 'interest-rate',
+        'title': "RBI Fair Practices Code - Interest Rate and Changes in Terms",
+        'keywords': ['interest rate', 'rate of interest', 'floating rate', 'without prior notice', 'reset of interest', 'change the interest'],
+    },
+    {
+        'id': 'foreclosure',
+        'title': "RBI - Foreclosure Charges and Prepayment Penalties",
+        'keywords': ['foreclosure', 'prepay', 'prepayment', 'pre-closure', 'part payment'],
+    },
+    {
+        'id': 'cooling-off',
+        'title': "RBI Digital Lending Guidelines - Cooling-off / Look-up Period",
+        'keywords': ['cooling-off', 'cooling off', 'look-up period', 'exit the loan'],
+    },
+    {
+        'id': 'grievance',
+        'title': "RBI Digital Lending Guidelines - Grievance Redressal",
+        'keywords': ['grievance', 'nodal officer', 'complaint', 'ombudsman', 'integrated ombudsman'],
+    },
+]
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over lower-cased keywords.
+    find() reports every keyword occurrence on word boundaries in one pass over the text.
+    """
+
+    def __init__(self, keywords):
+        # keywords: iterable of (keyword, payload)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for keyword, payload in keywords:
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((len(keyword), payload))
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text):
+        """Yield (start, end, payload) for every keyword match bounded by non-word characters; offsets index the given text."""
+        lowered = text.lower()
+        origin = None
+        if len(lowered) != len(text):
+            # A few characters lower-case to several ('İ' -> 'i̇'); map positions back to the original text
+            pieces = [ch.lower() for ch in text]
+            lowered = ''.join(pieces)
+            origin = [i for i, piece in enumerate(pieces) for _ in piece]
+        text = lowered
+        n = len(text)
+        state = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            if i + 1 < n and text[i + 1].isalnum():
+                continue
+            for length, payload in out[state]:
+                start = i + 1 - length
+                if start == 0 or not text[start - 1].isalnum():
+                    if origin is None:
+                        yield start, i + 1, payload
+                    else:
+                        yield origin[start], origin[i] + 1, payload
+
+
+class RuleIndex:
+    """Compiled RBI rule catalogue. match() returns every rule a clause touches, in catalogue order."""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.automaton = KeywordAutomaton(
+            (keyword, idx) for idx, rule in enumerate(self.rules) for keyword in rule.get('keywords', [])
+        )
+
+    def match(self, text):
+        hits = {}
+        for start, end, idx in self.automaton.find(text):
+            hits.setdefault(idx, []).append(text[start:end])
+        return [
+            {'id': self.rules[idx].get('id'), 'title': self.rules[idx]['title'], 'matched': sorted(set(words))}
+            for idx, words in sorted(hits.items())
+        ]
+
+
+def load_rule_catalogue(path=None):
+    path = path or RULES_PATH
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return DEFAULT_RULES
+
+
+@lru_cache(maxsize=1)
+def get_rule_index():
+    return RuleIndex(load_rule_catalogue())
+
+
+# --- Segmentation ---
+# A clause starts at a line beginning with one of these markers.
+_MARKER_RE = re.compile(
+    r'^\s*(?:'
+    r'(?:clause|section|article)\s+(?P<named>\d+(?:\.\d+)*[a-z]?)\b[.:)]?'
+    r'|(?P<dotted>\d+(?:\.\d+)+)[.)]?(?=\s)'
+    r'|(?P<number>\d+)[.)](?=\s)'
+    r'|\((?P<sub>[a-z]{1,2}|[ivx]{1,5}|\d{1,2})\)'
+    r'|(?P<subalpha>[a-z]|[ivx]{1,5})[.)](?=\s)'
+    r')',
+    re.IGNORECASE,
+)
+# Inline markers: text extracted from PDFs often arrives as one long line per page
+# ("LOAN AGREEMENT Clause 1 ... Clause 2 ..."), so long lines are also split before "Clause/Section/Article N".
+# Cross-references ("as per Clause 4", "under Section 2") are left alone. The split starts only at the first character
+# of a whitespace run, so the cross-reference check always sees the preceding word, however many spaces follow it.
+INLINE_SPLIT_MIN_CHARS = 200
+_INLINE_MARKER_RE = re.compile(
+    r'(?<=\S)(?<!\bper)(?<!\bunder)(?<!\bof)(?<!\bin)(?<!\bto)(?<!\bsee)(?<!\band)(?<!\bor)(?<!\bwith)(?<!\bby)'
+    r'\s+(?=(?:Clause|Section|Article|CLAUSE|SECTION|ARTICLE)\s+\d+(?:\.\d+)*[a-z]?\b)'
+)
+_HEADING_WORDS_RE = re.compile(r'^\s*(?:schedule|annexure|part|chapter)\b', re.IGNORECASE)
+
+
+def _is_heading(line):
+    stripped = line.strip()
+    if not stripped or len(stripped) > 80 or stripped[-1] in '.;,':
+        return False
+    if stripped.endswith(':'):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    if letters and all(c.isupper() for c in letters) and len(letters) > 2:
+        return True
+    return bool(_HEADING_WORDS_RE.match(stripped))
+
+
+def _marker_title(line, m):
+    """The text after a numbered marker when the line looks like a title ("2. Interest"), else None."""
+    rest = line[m.end():].strip()
+    if not rest or len(rest.split()) > 6 or rest[-1] in '.;,':
+        return None
+    return rest.rstrip(':')
+
+
+def _split_inline_markers(lines):
+    for line in lines:
+        if len(line) < INLINE_SPLIT_MIN_CHARS:
+            yield line
+            continue
+        yield from _INLINE_MARKER_RE.split(line)
+
+
+def segment_clauses(document_text):
+    """Split a contract into clauses. See iter_clauses()."""
+    return list(iter_clauses(document_text.splitlines()))
+
+
+def iter_clauses(lines):
+    """
+    Split a stream of lines into clauses, yielding each clause as soon as it is complete.
+    Numbered clauses/sections ("Clause 4", "Section 2.1", "3.", "4.2") start a new clause, also
+    mid-line in long lines such as a PDF page joined into one line;
+    sub-clauses ("(a)", "(ii)", "b)") start a child clause that records its parent's number;
+    heading lines, and numbered titles with no body of their own, are attached to the clauses
+    that follow them; blank-line separated paragraphs without a marker are clauses of their own.
+    Yields dicts: {'number', 'parent', 'heading', 'text'}.
+    """
+    ready = []
+    current = None
+    section_heading = None   # last unnumbered heading ("REPAYMENT TERMS")
+    title = None             # (top-level number, title) of a numbered heading ("2. Interest")
+    parent = None
+
+    def heading_for(number):
+        if title and number and (number == title[0] or number.startswith(title[0] + '.') or number.startswith(title[0] + '(')):
+            return title[1]
+        return section_heading
+
+    def flush(next_parent=None):
+        nonlocal current, title
+        if current is None:
+            return
+        if current['title'] and len(current['lines']) == 1 and next_parent is not None and (
+                next_parent == current['number'] or next_parent.startswith(current['number'] + '.')):
+            # A numbered line with only a short title is a heading for the sub-clauses that follow it
+            title = (current['number'], current['title'])
+        else:
+            text = '\n'.join(current['lines']).strip()
+            if text:
+                ready.append({'number': current['number'], 'parent': current['parent'],
+                                'heading': heading_for(current['number']), 'text': text})
+        current = None
+
+    for line in _split_inline_markers(lines):
+        if ready:
+            yield from ready
+            ready.clear()
+        if not line.strip():
+            # A blank line ends an unnumbered paragraph; numbered clauses may span paragraphs.
+            if current is not None and current['number'] is None:
+                flush()
+            continue
+        m = _MARKER_RE.match(line)
+        if m:
+            top = m.group('named') or m.group('dotted') or m.group('number')
+            sub = m.group('sub') or m.group('subalpha')
+            if m.group('dotted'):
+                flush(next_parent=top.rsplit('.', 1)[0])
+            else:
+                flush(next_parent=None if top else parent)
+            marker_title = None
+            if top:
+                number = top
+                clause_parent = top.rsplit('.', 1)[0] if m.group('dotted') else None
+                parent = top
+                if not m.group('dotted'):
+                    marker_title = _marker_title(line, m)
+            else:
+                number = f'{parent}({sub})' if parent else f'({sub})'
+                clause_parent = parent
+            current = {'number': number, 'parent': clause_parent, 'title': marker_title, 'lines': [line.strip()]}
+            continue
+        if _is_heading(line) and (current is None or len(current['lines']) > 1 or current['number'] is None):
+            flush()
+            section_heading = line.strip().rstrip(':')
+            title = None
+            continue
+        if current is None:
+            current = {'number': None, 'parent': None, 'title': None, 'lines': []}
+        current['lines'].append(line.strip())
+    flush()
+    yield from ready
+
+
+def index_clauses(document_text):
+    """Segment a document and attach every matching RBI rule to each clause."""
+    return list(iter_indexed_clauses(document_text.splitlines()))
+
+
+def iter_indexed_clauses(lines):
+    """Streaming variant of index_clauses() over an iterable of lines."""
+    index = get_rule_index()
+    for clause in iter_clauses(lines):
+        clause['rules'] = index.match(clause['text'])
+        yield clause
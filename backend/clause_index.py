@@ -0,0 +1,275 @@
+import os
+import re
+import json
+import zlib
+import logging
+import datetime
+import threading
+import numpy as np
+
+from file_lock import locked
+
+# --- Near-duplicate clause index ---
+# Lenders reuse boilerplate clauses with small wording changes, so exact-text caching rarely hits.
+# Each analyzed clause is reduced to a MinHash signature over word shingles; locality-sensitive
+# hashing on bands of the signature finds earlier clauses with a similar shingle set, and a clause whose
+# estimated Jaccard similarity is at least CLAUSE_INDEX_THRESHOLD reuses the stored status, confidence and
+# suggestion instead of running LegalBERT and FLAN-T5 again.
+#
+# On disk (CLAUSE_INDEX_DIR) the index is append-only: records.jsonl holds the stored results,
+# offsets.u64 their byte offsets and signatures.u16 the signatures, so insertion is incremental and
+# a crash can at most lose the tail. Every process appends under one file lock, and picks up the entries
+# other processes appended before adding its own, so in-memory ids always match positions on disk.
+# Band keys are kept in sorted NumPy arrays (binary search) plus a small dict of recent inserts that is
+# merged into the arrays every CLAUSE_INDEX_MERGE_EVERY inserts.
+
+CLAUSE_INDEX_ENABLED = os.getenv('CLAUSE_INDEX_ENABLED', '1') == '1'
+CLAUSE_INDEX_DIR = os.getenv('CLAUSE_INDEX_DIR', 'clause_index')
+CLAUSE_INDEX_THRESHOLD = float(os.getenv('CLAUSE_INDEX_THRESHOLD', '0.9'))
+CLAUSE_INDEX_MERGE_EVERY = int(os.getenv('CLAUSE_INDEX_MERGE_EVERY', '50000'))
+# 64 permutations in 16 bands of 4: pairs at Jaccard 0.9 collide in some band with probability ~1
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+MAX_CANDIDATES_PER_BAND = 32
+INDEX_FORMAT_VERSION = 1
+SEED = 1
+
+_rng = np.random.RandomState(SEED)
+# Multiply-shift hashing: h(x) = (a * x + b) >> 32 with odd 64-bit a
+_PERM_A = (_rng.randint(0, 2 ** 31, size=NUM_PERM, dtype=np.uint64) << np.uint64(33)) | \
+    (_rng.randint(0, 2 ** 31, size=NUM_PERM, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_PERM_B = _rng.randint(0, 2 ** 31, size=NUM_PERM, dtype=np.uint64) << np.uint64(32)
+_WORD = re.compile(r'[a-z0-9]+')
+# Clause numbering differs between otherwise identical agreements
+_LEADING_NUMBER = re.compile(r'^\s*(?:(?:clause|section|article)\s+)?(?:\d+(?:\.\d+)*[.)]?|[ivxlc]+[.)])\s+', re.IGNORECASE)
+
+
+def shingles(text):
+    words = _WORD.findall(_LEADING_NUMBER.sub('', text).lower())
+    if len(words) < SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def signature(text):
+    """b-bit MinHash signature (low 16 bits of each of NUM_PERM minima), or None for empty text."""
+    grams = shingles(text)
+    if not grams:
+        return None
+    x = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+    with np.errstate(over='ignore'):
+        hashed = (x[:, None] * _PERM_A[None, :] + _PERM_B[None, :]) >> np.uint64(32)
+    return (hashed.min(axis=0) & np.uint64(0xFFFF)).astype(np.uint16)
+
+
+def _band_keys(signatures):
+    """(n, NUM_PERM) uint16 -> (n, BANDS) uint64; four 16-bit values pack exactly into one key."""
+    return np.ascontiguousarray(signatures).view(np.uint64)
+
+
+class ClauseIndex:
+    """Persistent MinHash/LSH index from clause text to a previously computed clause result."""
+
+    def __init__(self, path=CLAUSE_INDEX_DIR, threshold=CLAUSE_INDEX_THRESHOLD, merge_every=CLAUSE_INDEX_MERGE_EVERY):
+        self.path = path
+        self.threshold = threshold
+        self.merge_every = merge_every
+        self._lock = threading.Lock()
+        self._signatures = np.zeros((0, NUM_PERM), dtype=np.uint16)
+        self._offsets = np.zeros(0, dtype=np.uint64)
+        self._sorted_keys = np.zeros((BANDS, 0), dtype=np.uint64)
+        self._sorted_ids = np.zeros((BANDS, 0), dtype=np.uint32)
+        self._recent = []
+        self._recent_offsets = []
+        self._recent_buckets = [{} for _ in range(BANDS)]
+        # Without a path the index lives in memory and offsets are positions in this list
+        self._memory_records = []
+        self.lookups = 0
+        self.hits = 0
+        if path:
+            self._load()
+
+    def __len__(self):
+        return len(self._signatures) + len(self._recent)
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = self._file('meta.json')
+        meta = {'format_version': INDEX_FORMAT_VERSION, 'num_perm': NUM_PERM, 'bands': BANDS,
+                'shingle_size': SHINGLE_SIZE, 'seed': SEED}
+        with locked(self._file('index')):
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    stored = json.load(f)
+                if stored != meta:
+                    raise ValueError(f'Clause index at {self.path} was built with {stored}, expected {meta}')
+            else:
+                with open(meta_path, 'w') as f:
+                    json.dump(meta, f)
+            self._sync_tail()
+
+    def _sync_tail(self):
+        """
+        Caller holds the file lock. Cut a torn tail left by a crashed writer, then load the entries
+        appended since this process last looked (by other processes, or everything on first load).
+        """
+        sig_path, off_path = self._file('signatures.u16'), self._file('offsets.u64')
+        sig_bytes = os.path.getsize(sig_path) if os.path.exists(sig_path) else 0
+        off_bytes = os.path.getsize(off_path) if os.path.exists(off_path) else 0
+        n = min(sig_bytes // (NUM_PERM * 2), off_bytes // 8)
+        for path, size, expected in ((sig_path, sig_bytes, n * NUM_PERM * 2), (off_path, off_bytes, n * 8)):
+            if size != expected:
+                with open(path, 'r+b') as f:
+                    f.truncate(expected)
+        known = len(self)
+        if n <= known:
+            return
+        signatures = np.fromfile(sig_path, dtype=np.uint16, offset=known * NUM_PERM * 2)[:(n - known) * NUM_PERM]
+        offsets = np.fromfile(off_path, dtype=np.uint64, offset=known * 8)[:n - known]
+        if known == 0:
+            # First load: straight into the sorted band arrays
+            self._signatures = signatures.reshape(-1, NUM_PERM)
+            self._offsets = offsets
+            self._rebuild_bands()
+        else:
+            self._add_recent(signatures.reshape(-1, NUM_PERM), offsets.tolist())
+
+    def _rebuild_bands(self):
+        keys = _band_keys(self._signatures).T
+        order = np.argsort(keys, axis=1, kind='stable')
+        self._sorted_keys = np.take_along_axis(keys, order, axis=1)
+        self._sorted_ids = order.astype(np.uint32)
+
+    def _merge_recent(self):
+        if not self._recent:
+            return
+        self._signatures = np.concatenate([self._signatures, np.vstack(self._recent)])
+        self._offsets = np.concatenate([self._offsets, np.asarray(self._recent_offsets, dtype=np.uint64)])
+        self._recent = []
+        self._recent_offsets = []
+        self._recent_buckets = [{} for _ in range(BANDS)]
+        self._rebuild_bands()
+
+    def _add_recent(self, signatures, offsets):
+        for sig, offset in zip(signatures, offsets):
+            doc_id = len(self)
+            self._recent.append(sig)
+            self._recent_offsets.append(offset)
+            for band, key in enumerate(_band_keys(sig[None, :])[0].tolist()):
+                self._recent_buckets[band].setdefault(key, []).append(doc_id)
+
+    def _signature_of(self, doc_id):
+        base = len(self._signatures)
+        return self._signatures[doc_id] if doc_id < base else self._recent[doc_id - base]
+
+    def _offset_of(self, doc_id):
+        base = len(self._offsets)
+        return int(self._offsets[doc_id]) if doc_id < base else self._recent_offsets[doc_id - base]
+
+    def _candidates(self, sig):
+        keys = _band_keys(sig[None, :])[0]
+        candidates = set()
+        for band in range(BANDS):
+            key = keys[band]
+            row = self._sorted_keys[band]
+            lo = np.searchsorted(row, key, side='left')
+            hi = min(np.searchsorted(row, key, side='right'), lo + MAX_CANDIDATES_PER_BAND)
+            candidates.update(self._sorted_ids[band, lo:hi].tolist())
+            candidates.update(self._recent_buckets[band].get(int(key), ())[:MAX_CANDIDATES_PER_BAND])
+        return candidates
+
+    def _best_match(self, sig):
+        candidates = list(self._candidates(sig))
+        if not candidates:
+            return None, 0.0
+        stacked = np.vstack([self._signature_of(c) for c in candidates])
+        similarity = (stacked == sig[None, :]).mean(axis=1)
+        # On equal similarity the newest entry wins, so an appended entry supersedes an older one
+        best = max(range(len(candidates)), key=lambda k: (similarity[k], candidates[k]))
+        return candidates[best], float(similarity[best])
+
+    def _read_record(self, doc_id):
+        if not self.path:
+            return self._memory_records[self._offset_of(doc_id)]
+        with open(self._file('records.jsonl'), 'rb') as f:
+            f.seek(self._offset_of(doc_id))
+            return json.loads(f.readline())
+
+    def lookup(self, text, count=True):
+        """
+        Return (record, similarity) for the most similar stored clause above the threshold, else (None, similarity).
+        count=False leaves the hit-rate statistics alone (for internal lookups).
+        """
+        sig = signature(text)
+        with self._lock:
+            self.lookups += count
+            if sig is None or not len(self):
+                return None, 0.0
+            doc_id, similarity = self._best_match(sig)
+            if doc_id is None or similarity < self.threshold:
+                return None, similarity
+            self.hits += count
+            return self._read_record(doc_id), similarity
+
+    def insert_many(self, texts, records):
+        """Append clause results; texts without any words are skipped."""
+        entries = [(sig, record) for sig, record in ((signature(t), r) for t, r in zip(texts, records)) if sig is not None]
+        if not entries:
+            return 0
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        sigs = np.vstack([sig for sig, _ in entries])
+        with self._lock:
+            if self.path:
+                # The lock spans all three appends, so concurrent workers never interleave entries
+                with locked(self._file('index')):
+                    self._sync_tail()
+                    offsets = []
+                    with open(self._file('records.jsonl'), 'ab') as f:
+                        f.seek(0, os.SEEK_END)
+                        for _, record in entries:
+                            offsets.append(f.tell())
+                            f.write(json.dumps({**record, 'indexed_at': now}).encode('utf-8') + b'\n')
+                    # Records first, then offsets, then signatures: an entry is visible only once all three exist
+                    with open(self._file('offsets.u64'), 'ab') as f:
+                        np.asarray(offsets, dtype=np.uint64).tofile(f)
+                    with open(self._file('signatures.u16'), 'ab') as f:
+                        sigs.tofile(f)
+            else:
+                offsets = list(range(len(self._memory_records), len(self._memory_records) + len(entries)))
+                self._memory_records.extend({**record, 'indexed_at': now} for _, record in entries)
+            self._add_recent(sigs, offsets)
+            if len(self._recent) >= self.merge_every:
+                self._merge_recent()
+        return len(entries)
+
+    def insert(self, text, record):
+        return self.insert_many([text], [record])
+
+    def stats(self):
+        with self._lock:
+            return {'clauses': len(self), 'lookups': self.lookups, 'hits': self.hits,
+                    'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else None}
+
+
+_clause_index = None
+_clause_index_lock = threading.Lock()
+
+
+def get_clause_index():
+    """Shared index, or None when disabled or the index on disk cannot be opened."""
+    global _clause_index
+    if not CLAUSE_INDEX_ENABLED:
+        return None
+    with _clause_index_lock:
+        if _clause_index is None:
+            try:
+                _clause_index = ClauseIndex()
+            except Exception:
+                logging.exception('Failed to open clause index; near-duplicate reuse disabled')
+                return None
+        return _clause_index
@@ -0,0 +1,151 @@
+import os
+
+# --- Token-aware clause packing ---
+# Every clause is tokenized once per tokenizer (TokenCache). Clauses longer than the model limit are
+# split into overlapping windows whose scores are merged; short clauses are packed into
+# length-bucketed batches under a token budget so batches carry little padding.
+
+WINDOW_OVERLAP = int(os.getenv('CLAUSE_WINDOW_OVERLAP', '64'))
+BATCH_TOKEN_BUDGET = int(os.getenv('CLAUSE_BATCH_TOKEN_BUDGET', '8192'))
+MAX_BATCH_SIZE = int(os.getenv('CLAUSE_MAX_BATCH_SIZE', '32'))
+REWRITE_PREFIX = "Rewrite this clause to be RBI compliant: "
+REWRITE_MAX_NEW_TOKENS = int(os.getenv('REWRITE_MAX_NEW_TOKENS', '128'))
+
+
+class TokenCache:
+    """Per-request cache of token ids, keyed by tokenizer and text."""
+
+    def __init__(self):
+        self._ids = {}
+
+    def encode(self, tokenizer, texts):
+        key = getattr(tokenizer, 'name_or_path', id(tokenizer))
+        missing = [t for t in dict.fromkeys(texts) if (key, t) not in self._ids]
+        if missing:
+            encoded = tokenizer(missing, add_special_tokens=False, truncation=False)['input_ids']
+            for text, ids in zip(missing, encoded):
+                self._ids[(key, text)] = ids
+        return [self._ids[(key, t)] for t in texts]
+
+
+def _supports_packing(pipe):
+    return getattr(pipe, 'tokenizer', None) is not None and getattr(pipe, 'model', None) is not None
+
+
+def _model_limit(pipe):
+    tokenizer, config = pipe.tokenizer, pipe.model.config
+    limit = getattr(tokenizer, 'model_max_length', 512)
+    positions = getattr(config, 'max_position_embeddings', None) or getattr(config, 'n_positions', None)
+    if positions:
+        limit = min(limit, positions)
+    # Tokenizers without a configured limit report a huge sentinel value
+    return limit if limit < 100000 else 512
+
+
+def split_windows(ids, size, overlap):
+    """Split token ids into windows of at most size tokens, consecutive windows sharing overlap tokens."""
+    if len(ids) <= size:
+        return [ids]
+    step = max(size - overlap, 1)
+    windows = []
+    start = 0
+    while True:
+        windows.append(ids[start:start + size])
+        if start + size >= len(ids):
+            return windows
+        start += step
+
+
+def pack_batches(items, token_budget=BATCH_TOKEN_BUDGET, max_batch=MAX_BATCH_SIZE):
+    """
+    Group (key, input_ids) items into batches of similar length.
+    Items are sorted by length so each batch pads only to its own longest member,
+    and a batch is closed when batch_size * longest would exceed the token budget.
+    """
+    batches = []
+    current = []
+    for item in sorted(items, key=lambda it: len(it[1])):
+        longest = len(item[1])
+        if current and (len(current) >= max_batch or (len(current) + 1) * longest > token_budget):
+            batches.append(current)
+            current = []
+        current.append(item)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _to_device(encoded, model):
+    device = getattr(model, 'device', None)
+    return {k: v.to(device) for k, v in encoded.items()} if device is not None else encoded
+
+
+def classify_clauses(pipe, texts, cache=None):
+    """
+    Classify clauses with a text-classification pipeline without silent truncation.
+    Returns one {'label', 'score'} dict per text, in input order.
+    """
+    if not texts:
+        return []
+    if not _supports_packing(pipe):
+        return [pipe(t)[0] for t in texts]
+    import torch
+    cache = cache or TokenCache()
+    tokenizer, model = pipe.tokenizer, pipe.model
+    body = _model_limit(pipe) - tokenizer.num_special_tokens_to_add(pair=False)
+    items = []
+    for idx, ids in enumerate(cache.encode(tokenizer, texts)):
+        for window in split_windows(ids, body, min(WINDOW_OVERLAP, body // 4)):
+            items.append((idx, tokenizer.build_inputs_with_special_tokens(window)))
+
+    # Length-weighted average of window probabilities per clause
+    sums = [None] * len(texts)
+    weights = [0] * len(texts)
+    for batch in pack_batches(items):
+        encoded = tokenizer.pad({'input_ids': [ids for _, ids in batch]}, return_tensors='pt')
+        with torch.no_grad():
+            probs = torch.softmax(model(**_to_device(encoded, model)).logits, dim=-1).cpu()
+        for (idx, ids), p in zip(batch, probs):
+            weighted = p * len(ids)
+            sums[idx] = weighted if sums[idx] is None else sums[idx] + weighted
+            weights[idx] += len(ids)
+
+    id2label = model.config.id2label
+    results = []
+    for idx in range(len(texts)):
+        probs = sums[idx] / weights[idx]
+        best = int(probs.argmax())
+        results.append({'label': id2label.get(best, f'LABEL_{best}'), 'score': float(probs[best])})
+    return results
+
+
+def rewrite_clauses(pipe, texts, cache=None, prefix=REWRITE_PREFIX):
+    """
+    Generate compliant rewrites with a text2text-generation pipeline.
+    The prompt prefix is tokenized once and prepended to each clause's cached ids; clauses longer than
+    the model limit are rewritten window by window and the pieces joined.
+    """
+    if not texts:
+        return []
+    if not _supports_packing(pipe):
+        outputs = [pipe(f'{prefix}{t}') for t in texts]
+        return [o[0]['generated_text'] if isinstance(o, list) and 'generated_text' in o[0] else None for o in outputs]
+    import torch
+    cache = cache or TokenCache()
+    tokenizer, model = pipe.tokenizer, pipe.model
+    prefix_ids = cache.encode(tokenizer, [prefix])[0]
+    body = _model_limit(pipe) - tokenizer.num_special_tokens_to_add(pair=False) - len(prefix_ids)
+    items = []
+    for idx, ids in enumerate(cache.encode(tokenizer, texts)):
+        for part, window in enumerate(split_windows(ids, body, 0)):
+            items.append(((idx, part), tokenizer.build_inputs_with_special_tokens(prefix_ids + window)))
+
+    pieces = [{} for _ in texts]
+    for batch in pack_batches(items):
+        encoded = tokenizer.pad({'input_ids': [ids for _, ids in batch]}, return_tensors='pt')
+        with torch.no_grad():
+            generated = model.generate(**_to_device(encoded, model), max_new_tokens=REWRITE_MAX_NEW_TOKENS)
+        for ((idx, part), _), text in zip(batch, tokenizer.batch_decode(generated, skip_special_tokens=True)):
+            pieces[idx][part] = text.strip()
+
+    return [' '.join(parts[p] for p in sorted(parts)) or None for parts in pieces]
@@ -0,0 +1,303 @@
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import datetime
+import threading
+from collections import Counter
+
+from file_lock import locked
+
+# --- Materialized dashboard aggregates ---
+# Counters and per-day rollups are updated as each compliance, fraud and loan-risk result is produced,
+# so /api/dashboard-summary reads a fixed-size structure instead of rescanning stored results.
+# State is shared through DASHBOARD_STATE_PATH: every DASHBOARD_SAVE_INTERVAL seconds each process takes
+# a file lock, merges the updates it recorded since its last save into the file and adopts the merged
+# totals, so workers never overwrite each other. `python dashboard_data.py rebuild` backfills the file
+# from the Firestore result collections as a new generation; running processes drop their updates from
+# before the rebuild (the backfill already counted them) and pick up the rebuilt totals on their next save.
+
+DASHBOARD_STATE_PATH = os.getenv('DASHBOARD_STATE_PATH', 'dashboard_state.json')
+DASHBOARD_DAYS = int(os.getenv('DASHBOARD_DAYS', '30'))
+DASHBOARD_SAVE_INTERVAL = float(os.getenv('DASHBOARD_SAVE_INTERVAL', '10'))
+RISK_LEVELS = ('Low', 'Medium', 'High')
+
+
+def _risk_level(value):
+    level = str(value or '').strip().capitalize()
+    return level if level in RISK_LEVELS else 'Unknown'
+
+
+def _day(when):
+    if when is None:
+        when = datetime.datetime.now(datetime.timezone.utc)
+    return when.date().isoformat()
+
+
+class DashboardAggregates:
+    """Incrementally maintained counters; every update and read is O(1) in history size."""
+
+    def __init__(self, state_path=DASHBOARD_STATE_PATH, days=DASHBOARD_DAYS, save_interval=DASHBOARD_SAVE_INTERVAL):
+        self.state_path = state_path
+        self.days = days
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+        # (kind, fields, when, recorded_at) recorded here but not yet merged into the state file
+        self._unsaved = []
+        self.reset()
+
+    def reset(self):
+        self.totals = Counter()
+        self.compliance_status = Counter()
+        self.non_compliant_by_rule = Counter()
+        self.fraud_risk = Counter()
+        self.loan_risk = Counter()
+        self.daily = {}
+        self.updated_at = None
+        self.generation = 0
+        self.rebuilt_at = None
+
+    def _bucket(self, when):
+        day = _day(when)
+        bucket = self.daily.get(day)
+        if bucket is None:
+            bucket = self.daily[day] = {
+                'compliance_checks': 0, 'non_compliant_clauses': 0,
+                'fraud_risk': Counter(), 'loan_risk': Counter(),
+            }
+            # Keep only the newest DASHBOARD_DAYS buckets
+            while len(self.daily) > self.days:
+                del self.daily[min(self.daily)]
+        return bucket
+
+    def _apply(self, kind, fields, when):
+        bucket = self._bucket(when)
+        if kind == 'compliance':
+            status, clauses, non_compliant, rule_titles = fields
+            self.totals['compliance_checks'] += 1
+            self.totals['clauses'] += clauses
+            self.compliance_status[status] += 1
+            self.non_compliant_by_rule.update(rule_titles)
+            self.totals['non_compliant_clauses'] += non_compliant
+            bucket['compliance_checks'] += 1
+            bucket['non_compliant_clauses'] += non_compliant
+        elif kind == 'fraud':
+            self.totals['fraud_checks'] += 1
+            self.fraud_risk[fields] += 1
+            bucket['fraud_risk'][fields] += 1
+        elif kind == 'loan_risk':
+            self.totals['loan_risk_assessments'] += 1
+            self.loan_risk[fields] += 1
+            bucket['loan_risk'][fields] += 1
+
+    def _record(self, kind, fields, when):
+        when = when or datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            self._apply(kind, fields, when)
+            if self.state_path:
+                self._unsaved.append((kind, fields, when, time.time()))
+            self.updated_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self._maybe_save()
+
+    def record_compliance(self, result, when=None):
+        clauses = result.get('clauses') or []
+        non_compliant = 0
+        rule_titles = []
+        for clause in clauses:
+            if clause.get('status') != 'non-compliant':
+                continue
+            non_compliant += 1
+            # A clause counts once for every rule it touches
+            rules = clause.get('rules') or [{'title': clause.get('rule')}]
+            rule_titles.extend(rule.get('title') or 'Unknown' for rule in rules)
+        self._record('compliance', (result.get('overallCompliance', 'Unknown'), len(clauses), non_compliant, rule_titles), when)
+
+    def record_fraud(self, fraud_risk, when=None):
+        self._record('fraud', _risk_level(fraud_risk), when)
+
+    def record_loan_risk(self, risk_level, when=None):
+        self._record('loan_risk', _risk_level(risk_level), when)
+
+    def summary(self):
+        self._maybe_save()
+        with self._lock:
+            return {
+                'totals': dict(self.totals),
+                'complianceStatus': dict(self.compliance_status),
+                'nonCompliantByRule': dict(self.non_compliant_by_rule),
+                'fraudRisk': dict(self.fraud_risk),
+                'loanRisk': dict(self.loan_risk),
+                'daily': [
+                    {
+                        'date': day,
+                        'complianceChecks': b['compliance_checks'],
+                        'nonCompliantClauses': b['non_compliant_clauses'],
+                        'fraudRisk': dict(b['fraud_risk']),
+                        'loanRisk': dict(b['loan_risk']),
+                    }
+                    for day, b in sorted(self.daily.items())
+                ],
+                'updatedAt': self.updated_at,
+            }
+
+    # --- Snapshot to / restore from disk ---
+    def _state(self):
+        return {
+            'totals': dict(self.totals),
+            'compliance_status': dict(self.compliance_status),
+            'non_compliant_by_rule': dict(self.non_compliant_by_rule),
+            'fraud_risk': dict(self.fraud_risk),
+            'loan_risk': dict(self.loan_risk),
+            'daily': {
+                day: {**b, 'fraud_risk': dict(b['fraud_risk']), 'loan_risk': dict(b['loan_risk'])}
+                for day, b in self.daily.items()
+            },
+            'updated_at': self.updated_at,
+            'generation': self.generation,
+            'rebuilt_at': self.rebuilt_at,
+        }
+
+    def _load_state(self, state):
+        self.reset()
+        self.totals.update(state.get('totals', {}))
+        self.compliance_status.update(state.get('compliance_status', {}))
+        self.non_compliant_by_rule.update(state.get('non_compliant_by_rule', {}))
+        self.fraud_risk.update(state.get('fraud_risk', {}))
+        self.loan_risk.update(state.get('loan_risk', {}))
+        for day, b in state.get('daily', {}).items():
+            self.daily[day] = {
+                'compliance_checks': b.get('compliance_checks', 0),
+                'non_compliant_clauses': b.get('non_compliant_clauses', 0),
+                'fraud_risk': Counter(b.get('fraud_risk', {})),
+                'loan_risk': Counter(b.get('loan_risk', {})),
+            }
+        self.updated_at = state.get('updated_at')
+        self.generation = state.get('generation', 0)
+        self.rebuilt_at = state.get('rebuilt_at')
+
+    def to_state(self):
+        with self._lock:
+            return self._state()
+
+    def load_state(self, state):
+        with self._lock:
+            self._load_state(state)
+
+    def _read_file(self):
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _write_file(self, state):
+        tmp_path = f'{self.state_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def load(self):
+        if self.state_path:
+            with locked(self.state_path):
+                state = self._read_file()
+            if state is not None:
+                self.load_state(state)
+
+    def save(self):
+        """Merge the updates recorded since the last save into the state file, then adopt the merged totals."""
+        if not self.state_path:
+            return
+        with self._lock, locked(self.state_path):
+            state = self._read_file()
+            if state is None:
+                merged = self
+            else:
+                merged = DashboardAggregates(state_path=None, days=self.days)
+                merged._load_state(state)
+                for kind, fields, when, recorded_at in self._unsaved:
+                    # Updates from before a rebuild this process has not seen yet are already in its totals
+                    if merged.generation == self.generation or recorded_at >= (merged.rebuilt_at or 0):
+                        merged._apply(kind, fields, when)
+                merged.updated_at = max(filter(None, (merged.updated_at, self.updated_at)), default=None)
+            state = merged._state()
+            self._write_file(state)
+            self._load_state(state)
+            self._unsaved = []
+            self._last_save = time.monotonic()
+
+    def replace(self, rebuilt, started_at):
+        """Install rebuilt aggregates (computed from a scan that began at started_at) as a new generation."""
+        state = rebuilt.to_state()
+        state['rebuilt_at'] = started_at
+        with self._lock:
+            if self.state_path:
+                with locked(self.state_path):
+                    on_disk = self._read_file() or {}
+                    state['generation'] = max(self.generation, on_disk.get('generation', 0)) + 1
+                    self._write_file(state)
+            else:
+                state['generation'] = self.generation + 1
+            self._load_state(state)
+            # Updates recorded here after the scan started may be missing from it; keep them for the next save
+            self._unsaved = [event for event in self._unsaved if event[3] >= started_at]
+            for kind, fields, when, _ in self._unsaved:
+                self._apply(kind, fields, when)
+
+    def _maybe_save(self):
+        # Runs even with nothing unsaved, to pick up other processes' updates and rebuilds
+        if self.state_path and time.monotonic() - self._last_save >= self.save_interval:
+            try:
+                self.save()
+            except Exception:
+                logging.exception('Failed to save dashboard aggregates')
+
+
+_aggregates = None
+_aggregates_lock = threading.Lock()
+
+
+def get_aggregates():
+    global _aggregates
+    with _aggregates_lock:
+        if _aggregates is None:
+            _aggregates = DashboardAggregates()
+            try:
+                _aggregates.load()
+            except Exception:
+                logging.exception('Failed to load dashboard aggregates; starting empty')
+            atexit.register(_aggregates.save)
+        return _aggregates
+
+
+def get_dashboard_summary():
+    return get_aggregates().summary()
+
+
+def rebuild(store=None, page_size=500):
+    """Recompute all aggregates from the stored result collections (backfill)."""
+    from persistence import get_result_store, COMPLIANCE_COLLECTION, FRAUD_COLLECTION, LOAN_RISK_COLLECTION
+    store = store or get_result_store()
+    started_at = time.time()
+    aggregates = DashboardAggregates(state_path=None)
+    for collection, record in (
+        (COMPLIANCE_COLLECTION, lambda doc: aggregates.record_compliance(doc.get('result') or {}, doc.get('created_at'))),
+        (FRAUD_COLLECTION, lambda doc: aggregates.record_fraud(doc.get('fraud_risk'), doc.get('created_at'))),
+        (LOAN_RISK_COLLECTION, lambda doc: aggregates.record_loan_risk(doc.get('risk_level'), doc.get('created_at'))),
+    ):
+        for doc in store.scan(collection, page_size=page_size):
+            record(doc)
+    target = get_aggregates()
+    target.replace(aggregates, started_at)
+    return target.summary()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild':
+        summary = rebuild()
+        logging.info(f"Rebuilt dashboard aggregates: {summary['totals']}")
+    else:
+        print('Usage: python dashboard_data.py rebuild')
+        sys.exit(2)
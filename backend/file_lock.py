@@ -0,0 +1,26 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, and the dev server runs a single process anyway
+    fcntl = None
+
+# --- Cross-process locking for state files shared by gunicorn workers ---
+# An exclusive flock on a sidecar "<path>.lock" file serializes read-modify-write of a state file
+# (or a group of append-only files) across processes; a threading.Lock is still needed within one.
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive lock on f'{path}.lock' for the duration of the block."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(f'{path}.lock', 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
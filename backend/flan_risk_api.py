@@ -3,13 +3,15 @@
 # Run: pip install transformers torch flask
 
 from flask import Flask, request, jsonify
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
+from functools import lru_cache
 
-# Load FLAN-T5 model and tokenizer (google/flan-t5-base)
+# FLAN-T5 model and tokenizer (google/flan-t5-base), downloaded and loaded on first prediction
 MODEL_ID = "google/flan-t5-base"
-tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
-model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_ID)
+
+@lru_cache(maxsize=1)
+def get_flan_t5():
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+    return AutoTokenizer.from_pretrained(MODEL_ID), AutoModelForSeq2SeqLM.from_pretrained(MODEL_ID)
 
 def build_prompt(profile):
     """Format applicant data into a prompt for FLAN-T5."""
@@ -27,6 +29,8 @@ def build_prompt(profile):
 
 def predict_risk(profile):
     """Run the FLAN-T5 model and decode the risk prediction."""
+    import torch
+    tokenizer, model = get_flan_t5()
     prompt = build_prompt(profile)
     inputs = tokenizer(prompt, return_tensors="pt")
     with torch.no_grad():
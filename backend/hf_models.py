@@ -0,0 +1,7 @@
+# Deferred access to HuggingFace pipelines.
+# transformers (and torch through it) is only imported when the first pipeline is built,
+# so importing the backend modules stays cheap and routes that need no model start instantly.
+
+def pipeline(*args, **kwargs):
+    from transformers import pipeline as hf_pipeline
+    return hf_pipeline(*args, **kwargs)
@@ -0,0 +1,194 @@
+import io
+import os
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+
+# --- Server-side document ingestion ---
+# Uploads are copied in fixed-size chunks into a temporary spool (memory up to INGEST_SPOOL_MEMORY_BYTES,
+# then disk) and text is extracted one page at a time, so memory stays bounded regardless of file size.
+
+INGEST_MAX_BYTES = int(os.getenv('INGEST_MAX_BYTES', str(25 * 1024 * 1024)))
+INGEST_MAX_PAGES = int(os.getenv('INGEST_MAX_PAGES', '500'))
+INGEST_SPOOL_MEMORY_BYTES = int(os.getenv('INGEST_SPOOL_MEMORY_BYTES', str(1024 * 1024)))
+INGEST_CHUNK_BYTES = 64 * 1024
+# DOCX has no fixed pages; explicit page breaks start a new page, otherwise every N paragraphs does
+DOCX_PARAGRAPHS_PER_PAGE = int(os.getenv('DOCX_PARAGRAPHS_PER_PAGE', '40'))
+TEXT_LINES_PER_PAGE = int(os.getenv('TEXT_LINES_PER_PAGE', '60'))
+
+PDF_TYPES = {'application/pdf'}
+DOCX_TYPES = {'application/vnd.openxmlformats-officedocument.wordprocessingml.document'}
+TEXT_TYPES = {'text/plain', 'text/markdown'}
+TEXT_EXTENSIONS = ('.txt', '.md', '.text')
+# Browsers and curl send these when they do not know the type; the extension and bytes decide then
+GENERIC_TYPES = {None, '', 'application/octet-stream'}
+
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class IngestionError(Exception):
+    """Raised for uploads that cannot be ingested; status_code is the HTTP status to return."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def spool_upload(stream, max_bytes=INGEST_MAX_BYTES):
+    """Copy an upload stream into a SpooledTemporaryFile in chunks, enforcing max_bytes."""
+    spool = tempfile.SpooledTemporaryFile(max_size=INGEST_SPOOL_MEMORY_BYTES)
+    total = 0
+    while True:
+        chunk = stream.read(INGEST_CHUNK_BYTES)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            spool.close()
+            raise IngestionError(f'File exceeds the {max_bytes} byte upload limit', 413)
+        spool.write(chunk)
+    spool.seek(0)
+    return spool, total
+
+
+def detect_kind(filename, content_type, head):
+    """Return 'pdf', 'docx' or 'text' from the content type, extension and magic bytes; 415 for anything else."""
+    name = (filename or '').lower()
+    if content_type in PDF_TYPES or name.endswith('.pdf') or head.startswith(b'%PDF'):
+        return 'pdf'
+    if content_type in DOCX_TYPES or name.endswith('.docx'):
+        return 'docx'
+    if head.startswith(b'PK') and content_type in GENERIC_TYPES:
+        return 'docx'
+    if (content_type in TEXT_TYPES or (content_type in GENERIC_TYPES and name.endswith(TEXT_EXTENSIONS))) \
+            and b'\x00' not in head:
+        return 'text'
+    raise IngestionError(f'Unsupported file type: {content_type or name or "unknown"}; upload a PDF, DOCX or text file', 415)
+
+
+def iter_pdf_pages(fileobj, max_pages=INGEST_MAX_PAGES):
+    from pypdf import PdfReader
+    try:
+        reader = PdfReader(fileobj)
+        page_count = len(reader.pages)
+    except Exception as e:
+        raise IngestionError(f'Could not read PDF: {str(e)}')
+    if page_count > max_pages:
+        raise IngestionError(f'PDF has {page_count} pages; the limit is {max_pages}', 413)
+    for number, page in enumerate(reader.pages, start=1):
+        try:
+            text = page.extract_text() or ''
+        except Exception as e:
+            raise IngestionError(f'Could not read page {number} of the PDF: {str(e)}')
+        yield text
+
+
+def _iterparse_docx(xml):
+    try:
+        yield from ElementTree.iterparse(xml, events=('end',))
+    except ElementTree.ParseError as e:
+        raise IngestionError(f'Could not read DOCX: {str(e)}')
+
+
+def iter_docx_pages(fileobj, max_pages=INGEST_MAX_PAGES):
+    """Stream paragraphs out of word/document.xml with iterparse, clearing elements as they are read."""
+    try:
+        archive = zipfile.ZipFile(fileobj)
+        xml = archive.open('word/document.xml')
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise IngestionError(f'Could not read DOCX: {str(e)}')
+    pages = 0
+    paragraphs = []
+    with archive, xml:
+        for event, elem in _iterparse_docx(xml):
+            if elem.tag != _W_NS + 'p':
+                continue
+            page_break = any(
+                br.get(_W_NS + 'type') == 'page' for br in elem.iter(_W_NS + 'br')
+            ) or any(True for _ in elem.iter(_W_NS + 'lastRenderedPageBreak'))
+            if page_break and paragraphs:
+                pages += 1
+                if pages > max_pages:
+                    raise IngestionError(f'DOCX exceeds the {max_pages} page limit', 413)
+                yield '\n'.join(paragraphs)
+                paragraphs = []
+            paragraphs.append(''.join(t.text or '' for t in elem.iter(_W_NS + 't')))
+            elem.clear()
+            if len(paragraphs) >= DOCX_PARAGRAPHS_PER_PAGE:
+                pages += 1
+                if pages > max_pages:
+                    raise IngestionError(f'DOCX exceeds the {max_pages} page limit', 413)
+                yield '\n'.join(paragraphs)
+                paragraphs = []
+    if paragraphs:
+        if pages + 1 > max_pages:
+            raise IngestionError(f'DOCX exceeds the {max_pages} page limit', 413)
+        yield '\n'.join(paragraphs)
+
+
+def iter_text_pages(fileobj, max_pages=INGEST_MAX_PAGES):
+    pages = 0
+    lines = []
+    for line in io.TextIOWrapper(fileobj, encoding='utf-8', errors='replace'):
+        lines.append(line.rstrip('\r\n'))
+        if len(lines) >= TEXT_LINES_PER_PAGE:
+            pages += 1
+            if pages > max_pages:
+                raise IngestionError(f'Text file exceeds the {max_pages} page limit', 413)
+            yield '\n'.join(lines)
+            lines = []
+    if lines:
+        yield '\n'.join(lines)
+
+
+def iter_pages(fileobj, kind, max_pages=INGEST_MAX_PAGES):
+    if kind == 'pdf':
+        return iter_pdf_pages(fileobj, max_pages)
+    if kind == 'docx':
+        return iter_docx_pages(fileobj, max_pages)
+    return iter_text_pages(fileobj, max_pages)
+
+
+class PageLineStream:
+    """
+    Turns pages into the line stream consumed by clause segmentation, while keeping
+    the first summary_chars of text for the document summary and counting pages.
+    """
+
+    def __init__(self, pages, summary_chars):
+        self.pages = pages
+        self.summary_chars = summary_chars
+        self.page_count = 0
+        self._head = []
+        self._head_len = 0
+
+    @property
+    def head_text(self):
+        return '\n'.join(self._head)
+
+    def __iter__(self):
+        for page in self.pages:
+            self.page_count += 1
+            if self._head_len < self.summary_chars:
+                self._head.append(page[:self.summary_chars - self._head_len])
+                self._head_len += len(self._head[-1])
+            yield from page.splitlines()
+            # Page boundaries end unnumbered paragraphs, as a blank line would
+            yield ''
+
+
+def ingest_upload(file_storage, analyze, summary_chars, max_bytes=INGEST_MAX_BYTES, max_pages=INGEST_MAX_PAGES):
+    """
+    Spool an uploaded werkzeug FileStorage and feed its pages, as they are extracted,
+    to analyze(lines, summary_text_fn). Returns (result, metadata).
+    """
+    spool, size = spool_upload(file_storage.stream, max_bytes)
+    try:
+        head = spool.read(8)
+        spool.seek(0)
+        kind = detect_kind(file_storage.filename, file_storage.mimetype, head)
+        stream = PageLineStream(iter_pages(spool, kind, max_pages), summary_chars)
+        result = analyze(stream, lambda: stream.head_text)
+        return result, {'document_name': file_storage.filename, 'document_type': kind, 'bytes': size, 'pages': stream.page_count}
+    finally:
+        spool.close()
@@ -0,0 +1,230 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+
+# --- Memory-mapped model artifacts ---
+# A tree ensemble is flattened into a handful of large, uncompressed .npy arrays plus a manifest.
+# Loading opens the arrays with mmap_mode='r', so it costs almost nothing and every worker on the
+# host shares the same page-cache pages instead of unpickling a private copy of each tree.
+# Scoring walks all trees at once with NumPy and does not import scikit-learn.
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+_ARRAYS = ('left', 'right', 'feature', 'threshold', 'leaf_value', 'roots')
+
+
+class ArtifactError(Exception):
+    pass
+
+
+def _flatten_trees(trees, feature_maps, leaf_value_fn):
+    """Concatenate fitted sklearn trees into global node arrays (child indices made global)."""
+    lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+    offset = 0
+    for tree, feature_map in zip(trees, feature_maps):
+        t = tree.tree_
+        n = t.node_count
+        is_leaf = t.children_left == -1
+        left = np.where(is_leaf, -1, t.children_left + offset)
+        right = np.where(is_leaf, -1, t.children_right + offset)
+        # Map subset feature indices back to the model's input columns
+        feature = np.where(is_leaf, 0, np.asarray(feature_map)[np.maximum(t.feature, 0)])
+        lefts.append(left)
+        rights.append(right)
+        features.append(feature)
+        thresholds.append(t.threshold)
+        values.append(leaf_value_fn(tree, is_leaf))
+        roots.append(offset)
+        offset += n
+    return {
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'leaf_value': np.concatenate(values).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32),
+    }
+
+
+def _node_depths(t):
+    depth = np.zeros(t.node_count, dtype=np.float64)
+    for node in range(t.node_count):
+        for child in (t.children_left[node], t.children_right[node]):
+            if child != -1:
+                depth[child] = depth[node] + 1
+    return depth
+
+
+def export_model(model, path, feature_names, version='1'):
+    """Write an IsolationForest or RandomForest/ExtraTrees model as a memory-mappable artifact directory."""
+    import sklearn
+    from sklearn.ensemble import IsolationForest
+    from sklearn.ensemble._iforest import _average_path_length
+
+    n_features = model.n_features_in_
+    if len(feature_names) != n_features:
+        raise ArtifactError(f'{len(feature_names)} feature names for a model with {n_features} features')
+    params = {}
+    if isinstance(model, IsolationForest):
+        model_type = 'isolation_forest'
+
+        def leaf_value(tree, is_leaf):
+            # Path length of each leaf as used by IsolationForest.score_samples
+            t = tree.tree_
+            return np.where(is_leaf, _node_depths(t) + 1 + _average_path_length(t.n_node_samples) - 1.0, 0.0)
+
+        feature_maps = model.estimators_features_
+        params['offset'] = float(model.offset_)
+        params['denominator'] = float(len(model.estimators_) * _average_path_length([model._max_samples])[0])
+        arrays = _flatten_trees(model.estimators_, feature_maps, leaf_value)
+    elif hasattr(model, 'estimators_') and hasattr(model, 'classes_'):
+        model_type = 'forest_classifier'
+        n_classes = len(model.classes_)
+
+        def leaf_value(tree, is_leaf):
+            value = tree.tree_.value[:, 0, :]
+            return value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+
+        arrays = _flatten_trees(model.estimators_, [range(n_features)] * len(model.estimators_), leaf_value)
+        params['classes'] = [c.item() if hasattr(c, 'item') else c for c in model.classes_]
+        params['n_classes'] = n_classes
+    elif hasattr(model, 'estimators_'):
+        model_type = 'forest_regressor'
+        arrays = _flatten_trees(model.estimators_, [range(n_features)] * len(model.estimators_),
+                                lambda tree, is_leaf: tree.tree_.value[:, 0, 0])
+    else:
+        raise ArtifactError(f'Unsupported model type: {type(model).__name__}')
+
+    os.makedirs(path, exist_ok=True)
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model_type': model_type,
+        'model_version': version,
+        'sklearn_version': sklearn.__version__,
+        'feature_names': list(feature_names),
+        'n_trees': int(len(arrays['roots'])),
+        'n_nodes': int(len(arrays['left'])),
+        'params': params,
+        'arrays': {},
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    for name in _ARRAYS:
+        array = np.ascontiguousarray(arrays[name])
+        np.save(os.path.join(path, f'{name}.npy'), array)
+        manifest['arrays'][name] = {'dtype': str(array.dtype), 'shape': list(array.shape)}
+    # Manifest last, so a half-written artifact never validates
+    with open(os.path.join(path, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class MappedForest:
+    """Read-only tree ensemble backed by memory-mapped arrays, with the sklearn scoring API."""
+
+    def __init__(self, path, manifest, arrays):
+        self.path = path
+        self.manifest = manifest
+        self.model_type = manifest['model_type']
+        self.feature_names = manifest['feature_names']
+        self.n_features_in_ = len(self.feature_names)
+        self.params = manifest['params']
+        for name, array in arrays.items():
+            setattr(self, f'_{name}', array)
+        if self.model_type == 'forest_classifier':
+            self.classes_ = np.asarray(self.params['classes'])
+
+    def _leaf_values(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f'Expected input with {self.n_features_in_} features, got shape {X.shape}')
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = X.astype(np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self._roots, (X.shape[0], len(self._roots))).copy()
+        while True:
+            left = self._left[nodes]
+            active = left != -1
+            if not active.any():
+                break
+            go_left = X[rows, self._feature[nodes]] <= self._threshold[nodes]
+            nodes = np.where(active, np.where(go_left, left, self._right[nodes]), nodes)
+        return self._leaf_value[nodes]
+
+    # --- IsolationForest API ---
+    def score_samples(self, X):
+        depths = self._leaf_values(X).sum(axis=1)
+        return -(2.0 ** (-depths / self.params['denominator']))
+
+    def decision_function(self, X):
+        return self.score_samples(X) - self.params['offset']
+
+    # --- Forest API ---
+    def predict_proba(self, X):
+        return self._leaf_values(X).mean(axis=1)
+
+    def predict(self, X):
+        if self.model_type == 'isolation_forest':
+            return np.where(self.decision_function(X) < 0, -1, 1)
+        if self.model_type == 'forest_classifier':
+            return self.classes_[self.predict_proba(X).argmax(axis=1)]
+        return self._leaf_values(X).mean(axis=1)
+
+
+def load_artifact(path, expected_features=None, expected_type=None, expected_version=None, mmap=True):
+    """
+    Open an artifact directory. The manifest's format version, model type, model version and feature
+    schema are checked before any array is mapped; arrays are opened with mmap_mode='r'.
+    """
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ArtifactError(f'No artifact manifest at {manifest_path}')
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format {manifest.get('format_version')} (expected {ARTIFACT_FORMAT_VERSION})")
+    if expected_type and manifest['model_type'] != expected_type:
+        raise ArtifactError(f"Artifact is a {manifest['model_type']}, expected {expected_type}")
+    if expected_version and str(manifest.get('model_version')) != str(expected_version):
+        raise ArtifactError(f"Artifact is model version {manifest.get('model_version')}, expected {expected_version}")
+    if expected_features is not None and list(expected_features) != manifest['feature_names']:
+        raise ArtifactError(f"Feature schema mismatch: artifact has {manifest['feature_names']}, expected {list(expected_features)}")
+    arrays = {}
+    for name, spec in manifest['arrays'].items():
+        array = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None)
+        if str(array.dtype) != spec['dtype'] or list(array.shape) != spec['shape']:
+            raise ArtifactError(f'Array {name} does not match the manifest')
+        arrays[name] = array
+    return MappedForest(path, manifest, arrays)
+
+
+def load_model(artifact_path, pickle_path, expected_features=None, expected_type=None, expected_version=None):
+    """
+    Prefer the memory-mapped artifact when present; fall back to the joblib pickle.
+    A pickle has no manifest, so only its input width (and column names, if sklearn recorded them) is checked.
+    """
+    if artifact_path and os.path.isdir(artifact_path):
+        return load_artifact(artifact_path, expected_features, expected_type, expected_version)
+    import joblib
+    model = joblib.load(pickle_path)
+    if expected_features is not None:
+        names = getattr(model, 'feature_names_in_', None)
+        if names is not None and list(names) != list(expected_features):
+            raise ArtifactError(f'Feature schema mismatch: model has {list(names)}, expected {list(expected_features)}')
+        n_features = getattr(model, 'n_features_in_', len(expected_features))
+        if n_features != len(expected_features):
+            raise ArtifactError(f'Model takes {n_features} features, expected {len(expected_features)}')
+    return model
+
+
+if __name__ == '__main__':
+    # python model_artifacts.py export [--version=<v>] <model.pkl> <artifact_dir> <feature> [<feature> ...]
+    versions = [a.split('=', 1)[1] for a in sys.argv[1:] if a.startswith('--version=')]
+    argv = [a for a in sys.argv if not a.startswith('--version=')]
+    if len(argv) < 5 or argv[1] != 'export':
+        print('Usage: python model_artifacts.py export [--version=<v>] <model.pkl> <artifact_dir> <feature> [<feature> ...]')
+        sys.exit(2)
+    import joblib
+    manifest = export_model(joblib.load(argv[2]), argv[3], argv[4:], version=versions[-1] if versions else '1')
+    print(f"Exported {manifest['model_type']} v{manifest['model_version']} with {manifest['n_trees']} trees / {manifest['n_nodes']} nodes to {argv[3]}")
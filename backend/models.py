@@ -1,4 +1,5 @@
 import os
+import logging
 import requests
 
 HF_API_TOKEN = os.getenv('HF_API_TOKEN')
@@ -13,10 +14,11 @@ def hf_inference(model: str, payload: dict):
     return response.json()
 
 # --- Compliance Analysis ---
-import re
-
-from transformers import pipeline
+from hf_models import pipeline
 from functools import lru_cache
+from clause_engine import iter_indexed_clauses, DEFAULT_RULE
+from clause_packing import TokenCache, classify_clauses, rewrite_clauses
+from suggestions import SUGGESTION_MODE, attach_suggestion_handles, cache_suggestion, generate_suggestions, suggestion_id
 
 @lru_cache(maxsize=1)
 def get_legalbert_pipeline():
@@ -30,56 +32,182 @@ def get_flan_t5_pipeline():
 def get_distilbart_pipeline():
     return pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
 
-def analyze_compliance(document_text):
-    import re
-    clause_results = []
-    compliant_count = 0
-    non_compliant_count = 0
-    legalbert = get_legalbert_pipeline()
-    flan_t5 = get_flan_t5_pipeline()
-    distilbart = get_distilbart_pipeline()
-    # Split the document into clauses (heuristic: split by double newlines or numbered headings)
-    clauses = re.split(r'\n{2,}|(?=Clause \d+)', document_text)
-    for idx, clause in enumerate([c.strip() for c in clauses if c.strip()]):
+ANALYSIS_BATCH_CLAUSES = int(os.getenv('ANALYSIS_BATCH_CLAUSES', '64'))
+SUMMARY_MAX_CHARS = int(os.getenv('SUMMARY_MAX_CHARS', '20000'))
+
+def analyze_compliance(document_text, defer_suggestions=None):
+    # Split the document into clauses and attach every matching RBI rule in one pass
+    return analyze_clause_stream(iter_indexed_clauses(document_text.splitlines()), document_text, defer_suggestions)
+
+def _reused_result(clause_id, segment, record, similarity):
+    # Only the model outputs are reused; the rule comes from this clause's own rule matches
+    rules = segment['rules']
+    return {
+        'id': clause_id,
+        'text': segment['text'],
+        'status': record['status'],
+        'confidence': record['confidence'],
+        'rule': rules[0]['title'] if rules else DEFAULT_RULE,
+        'rules': rules,
+        'number': segment['number'],
+        'heading': segment['heading'],
+        'suggestion': record['suggestion'],
+        'reused': True,
+        'similarity': round(similarity, 3)
+    }
+
+def _analyze_clause_batch(segments, first_id, legalbert, flan_t5, token_cache, clause_index=None):
+    if clause_index is None:
+        return _run_clause_models(segments, first_id, legalbert, flan_t5, token_cache)
+    # Near-duplicates of previously analyzed clauses reuse the stored result; only the rest reach the models
+    results = {}
+    for idx, segment in enumerate(segments):
+        record, similarity = clause_index.lookup(segment['text'])
+        if record is not None:
+            results[idx] = _reused_result(first_id + idx, segment, record, similarity)
+    if flan_t5 is not None:
+        _fill_reused_suggestions(list(results.values()), flan_t5)
+    fresh = [i for i in range(len(segments)) if i not in results]
+    fresh_results = _run_clause_models([segments[i] for i in fresh], first_id, legalbert, flan_t5, token_cache) if fresh else []
+    for i, result in zip(fresh, fresh_results):
+        result['id'] = first_id + i
+        results[i] = result
+    # Errors are never stored, so a failed model call is retried next time
+    stored = [c for c in fresh_results
+              if c['status'] != 'error' and not (c['suggestion'] or '').startswith('Error generating suggestion')]
+    try:
+        clause_index.insert_many(
+            [c['text'] for c in stored],
+            [{'status': c['status'], 'confidence': c['confidence'], 'suggestion': c['suggestion']} for c in stored]
+        )
+    except Exception:
+        logging.exception('Failed to update clause index')
+    return [results[i] for i in range(len(segments))]
+
+def _fill_reused_suggestions(reused, flan_t5):
+    # Eager mode: a hit indexed by a deferred analysis has no rewrite yet, so generate it inline
+    missing = [c for c in reused if c['status'] == 'non-compliant' and not c['suggestion']]
+    if not missing:
+        return
+    try:
+        generated = generate_suggestions([c['text'] for c in missing], pipe=flan_t5)
+    except Exception as e:
+        for clause in missing:
+            clause['suggestion'] = f"Error generating suggestion: {str(e)}"
+        return
+    for clause in missing:
+        # Still None if another request is generating it; attach_suggestion_handles then returns a handle
+        clause['suggestion'] = generated.get(suggestion_id(clause['text']))
+
+def _batch_or_per_clause(run, texts):
+    """
+    Run a batched model call; if the batch fails, retry clause by clause so that only the failing
+    clauses are marked. Returns (outputs, errors) with None in the failing / succeeding positions.
+    """
+    try:
+        return run(texts), [None] * len(texts)
+    except Exception:
+        if len(texts) == 1:
+            raise
+    outputs, errors = [], []
+    for text in texts:
         try:
-            compliance_result = legalbert(clause)
-            label = compliance_result[0]['label']
-            score = compliance_result[0].get('score', 0.8)
-            compliant = label in ['LABEL_1', 'POSITIVE', 'COMPLIANT']
-            suggestion = None
-            if not compliant:
-                try:
-                    rewrite_result = flan_t5(f"Rewrite this clause to be RBI compliant: {clause}")
-                    suggestion = rewrite_result[0]['generated_text'] if isinstance(rewrite_result, list) and 'generated_text' in rewrite_result[0] else None
-                except Exception as e:
-                    suggestion = f"Error generating suggestion: {str(e)}"
-            rule = "General RBI Guidelines for Digital Lending"
-            if not compliant and 'penalty' in clause.lower():
-                rule = "RBI/2022-23/45 - Penalty and Late Payment Guidelines"
-            if compliant:
-                compliant_count += 1
-            else:
-                non_compliant_count += 1
-            clause_results.append({
-                'id': idx+1,
-                'text': clause,
-                'status': 'compliant' if compliant else 'non-compliant',
-                'confidence': score,
-                'rule': rule,
-                'suggestion': suggestion
-            })
+            outputs.append(run([text])[0])
+            errors.append(None)
+        except Exception as e:
+            outputs.append(None)
+            errors.append(e)
+    return outputs, errors
+
+def _run_clause_models(segments, first_id, legalbert, flan_t5, token_cache):
+    texts = [segment['text'] for segment in segments]
+    # Long clauses are windowed and short ones packed into length-bucketed batches
+    try:
+        predictions, classify_errors = _batch_or_per_clause(lambda batch: classify_clauses(legalbert, batch, token_cache), texts)
+    except Exception as e:
+        predictions, classify_errors = [None] * len(texts), [e] * len(texts)
+    statuses = [p['label'] in ['LABEL_1', 'POSITIVE', 'COMPLIANT'] if p else None for p in predictions]
+    # Without flan_t5 (deferred mode) rewrites are left to /api/clause-suggestions
+    to_rewrite = [i for i, compliant in enumerate(statuses) if compliant is False] if flan_t5 is not None else []
+    suggestions = {}
+    if to_rewrite:
+        try:
+            rewrites, rewrite_errors = _batch_or_per_clause(lambda batch: rewrite_clauses(flan_t5, batch, token_cache), [texts[i] for i in to_rewrite])
         except Exception as e:
+            rewrites, rewrite_errors = [None] * len(to_rewrite), [e] * len(to_rewrite)
+        for i, suggestion, error in zip(to_rewrite, rewrites, rewrite_errors):
+            if error is not None:
+                suggestions[i] = f"Error generating suggestion: {str(error)}"
+            else:
+                suggestions[i] = suggestion
+                cache_suggestion(texts[i], suggestion)
+    clause_results = []
+    for idx, segment in enumerate(segments):
+        clause = segment['text']
+        rules = segment['rules']
+        if predictions[idx] is None:
             clause_results.append({
-                'id': idx+1,
+                'id': first_id + idx,
                 'text': clause,
                 'status': 'error',
                 'confidence': 0.0,
                 'rule': None,
-                'suggestion': f'Error analyzing clause: {str(e)}'
+                'rules': rules,
+                'number': segment['number'],
+                'heading': segment['heading'],
+                'suggestion': f'Error analyzing clause: {str(classify_errors[idx])}',
+                'reused': False
             })
+            continue
+        compliant = statuses[idx]
+        clause_results.append({
+            'id': first_id + idx,
+            'text': clause,
+            'status': 'compliant' if compliant else 'non-compliant',
+            'confidence': predictions[idx].get('score', 0.8),
+            'rule': rules[0]['title'] if rules else DEFAULT_RULE,
+            'rules': rules,
+            'number': segment['number'],
+            'heading': segment['heading'],
+            'suggestion': suggestions.get(idx),
+            'reused': False
+        })
+    return clause_results
+
+def analyze_clause_stream(segments, summary_text, defer_suggestions=None):
+    """
+    Analyze clauses as they arrive (e.g. page by page from an upload), in batches of
+    ANALYSIS_BATCH_CLAUSES. summary_text is the text to summarize, or a callable returning it
+    once all segments have been consumed. With defer_suggestions (default: SUGGESTION_MODE)
+    non-compliant clauses get a suggestion_id instead of an inline rewrite.
+    """
+    if defer_suggestions is None:
+        defer_suggestions = SUGGESTION_MODE == 'deferred'
+    clause_results = []
+    legalbert = get_legalbert_pipeline()
+    flan_t5 = None if defer_suggestions else get_flan_t5_pipeline()
+    distilbart = get_distilbart_pipeline()
+    # Tokenize each clause once; the cache is shared by classification and rewrites
+    token_cache = TokenCache()
+    from clause_index import get_clause_index
+    clause_index = get_clause_index()
+    pending = []
+    for segment in segments:
+        pending.append(segment)
+        if len(pending) >= ANALYSIS_BATCH_CLAUSES:
+            clause_results.extend(_analyze_clause_batch(pending, len(clause_results) + 1, legalbert, flan_t5, token_cache, clause_index))
+            pending = []
+            token_cache = TokenCache()
+    if pending:
+        clause_results.extend(_analyze_clause_batch(pending, len(clause_results) + 1, legalbert, flan_t5, token_cache, clause_index))
+    attach_suggestion_handles(clause_results)
+    compliant_count = sum(1 for c in clause_results if c['status'] == 'compliant')
+    non_compliant_count = sum(1 for c in clause_results if c['status'] == 'non-compliant')
     overall = 'Compliant' if non_compliant_count == 0 else ('Partial' if compliant_count > 0 else 'Non-compliant')
+    if callable(summary_text):
+        summary_text = summary_text()
     try:
-        summary_result = distilbart(document_text)
+        summary_result = distilbart(summary_text[:SUMMARY_MAX_CHARS])
         summary = summary_result[0]['summary_text'] if isinstance(summary_result, list) and 'summary_text' in summary_result[0] else None
     except Exception as e:
         summary = f'Error generating summary: {str(e)}'
@@ -87,24 +215,19 @@ def analyze_compliance(document_text):
         'overallCompliance': overall,
         'compliantClauses': compliant_count,
         'nonCompliantClauses': non_compliant_count,
+        'reusedClauses': sum(1 for c in clause_results if c.get('reused')),
         'clauses': clause_results,
         'summary': summary
     }
 
 
+@lru_cache(maxsize=1)
 def get_bart_mnli():
-    global _bart_mnli
-    with _model_lock:
-        if _bart_mnli is None:
-            _bart_mnli = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-        return _bart_mnli
+    return pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
 
+@lru_cache(maxsize=1)
 def get_spam_bert():
-    global _spam_bert
-    with _model_lock:
-        if _spam_bert is None:
-            _spam_bert = pipeline("text-classification", model="mrm8488/bert-tiny-finetuned-sms-spam-detection")
-        return _spam_bert
+    return pipeline("text-classification", model="mrm8488/bert-tiny-finetuned-sms-spam-detection")
 
 # --- Compliance Analysis Logic ---
 
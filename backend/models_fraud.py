@@ -1,19 +1,38 @@
-import numpy as np
-from transformers import pipeline
+from hf_models import pipeline
 from threading import Lock
-import joblib
 import os
 
 _model_lock = Lock()
 _isolation_forest = None
 
 ANOMALY_MODEL_PATH = os.getenv('ANOMALY_MODEL_PATH', 'fraud_isolation_forest.pkl')
+# Memory-mapped artifact (see model_artifacts.py); used instead of the pickle when present
+ANOMALY_ARTIFACT_PATH = os.getenv('ANOMALY_ARTIFACT_PATH', 'fraud_isolation_forest.artifact')
+FRAUD_FEATURES = ['age', 'income', 'credit_score', 'existing_loans', 'loan_amount']
+# A model retrained with velocity.VELOCITY_FEATURES appended is picked up automatically
+from velocity import VELOCITY_FEATURES
+ANOMALY_FEATURES = FRAUD_FEATURES + VELOCITY_FEATURES
+ANOMALY_MODEL_VERSION = os.getenv('ANOMALY_MODEL_VERSION')  # unset accepts any artifact version
+
+def model_features(model):
+    """Input columns of an anomaly model: the static applicant fields, optionally followed by velocity features."""
+    names = getattr(model, 'feature_names', None)
+    if names is None:
+        n_features = getattr(model, 'n_features_in_', len(FRAUD_FEATURES))
+        names = ANOMALY_FEATURES if n_features == len(ANOMALY_FEATURES) else FRAUD_FEATURES
+    if list(names) not in (FRAUD_FEATURES, ANOMALY_FEATURES):
+        raise ValueError(f'Unsupported anomaly model features: {list(names)}')
+    return list(names)
 
 def get_isolation_forest():
     global _isolation_forest
     with _model_lock:
         if _isolation_forest is None:
-            _isolation_forest = joblib.load(ANOMALY_MODEL_PATH)
+            from model_artifacts import load_model
+            model = load_model(ANOMALY_ARTIFACT_PATH, ANOMALY_MODEL_PATH, expected_type='isolation_forest',
+                               expected_version=ANOMALY_MODEL_VERSION)
+            model_features(model)
+            _isolation_forest = model
         return _isolation_forest
 
 def get_spam_bert():
@@ -30,9 +49,10 @@ def get_bart_mnli():
             get_bart_mnli._bart_mnli = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
         return get_bart_mnli._bart_mnli
 
-def detect_fraud_advanced(tabular_features: dict, text_fields: dict = None):
+def detect_fraud_advanced(tabular_features: dict, text_fields: dict = None, velocity_features: dict = None):
     """
     Robust fraud detection: runs Isolation Forest if all numeric features are present and valid, otherwise skips it.
+    velocity_features (see velocity.py) are passed to models trained on ANOMALY_FEATURES.
     Always returns a valid response with as much analysis as possible.
     """
     anomaly_score = None
@@ -40,18 +60,19 @@ def detect_fraud_advanced(tabular_features: dict, text_fields: dict = None):
     isolation_error = None
     # Try to run Isolation Forest only if all required fields are present and numeric
     try:
-        required_fields = ['age', 'income', 'credit_score', 'existing_loans', 'loan_amount']
+        isolation_forest = get_isolation_forest()
+        values = {**tabular_features, **(velocity_features or {})}
         X_vals = []
-        for key in required_fields:
-            val = tabular_features.get(key, None)
+        for key in model_features(isolation_forest):
+            val = values.get(key, None)
             if val is None:
                 raise ValueError(f"Missing field: {key}")
             try:
                 X_vals.append(float(val))
             except Exception:
                 raise ValueError(f"Invalid value for {key}: {val}")
+        import numpy as np
         X = np.array([X_vals], dtype=float)
-        isolation_forest = get_isolation_forest()
         anomaly_score = -isolation_forest.decision_function(X)[0]
         is_anomaly = isolation_forest.predict(X)[0] == -1
     except Exception as e:
@@ -82,10 +103,10 @@ def detect_fraud_advanced(tabular_features: dict, text_fields: dict = None):
         'anomaly_error': isolation_error,
         'text_fraud': text_result,
         'logic_validation': nli_result,
+        'velocity': velocity_features,
         'explanation': 'Scores computed by Isolation Forest (if data present) and transformer models.'
     }
 
-from transformers import pipeline
 _fraud_classifier = None
 _fraud_classifier_lock = Lock()
 
@@ -1,7 +1,5 @@
-import numpy as np
 import os
-import joblib
-from transformers import pipeline
+from hf_models import pipeline
 from threading import Lock
 
 # --- Tabular Loan Risk Model (Random Forest/XGBoost) ---
@@ -11,13 +9,25 @@ _isolation_forest = None
 
 MODEL_PATH = os.getenv('RISK_MODEL_PATH', 'loan_risk_model.pkl')
 ANOMALY_MODEL_PATH = os.getenv('ANOMALY_MODEL_PATH', 'fraud_isolation_forest.pkl')
+# Memory-mapped artifacts (see model_artifacts.py); used instead of the pickles when present
+RISK_ARTIFACT_PATH = os.getenv('RISK_ARTIFACT_PATH', 'loan_risk_model.artifact')
+ANOMALY_ARTIFACT_PATH = os.getenv('ANOMALY_ARTIFACT_PATH', 'fraud_isolation_forest.artifact')
+FRAUD_FEATURES = ['age', 'income', 'credit_score', 'existing_loans', 'loan_amount']
+# Input columns of the loan risk classifier, in training order
+RISK_FEATURES = ['age', 'income', 'credit_score', 'existing_loans', 'loan_amount']
+# Pin the deployed model versions (the artifact manifest's model_version); unset accepts any version
+RISK_MODEL_VERSION = os.getenv('RISK_MODEL_VERSION')
+ANOMALY_MODEL_VERSION = os.getenv('ANOMALY_MODEL_VERSION')
 
 # Load tabular risk model (Random Forest/XGBoost)
 def get_risk_model():
     global _risk_model
     with _model_lock:
         if _risk_model is None:
-            _risk_model = joblib.load(MODEL_PATH)
+            from model_artifacts import load_model
+            # RandomForestClassifier artifacts are exported with model_type 'forest_classifier'
+            _risk_model = load_model(RISK_ARTIFACT_PATH, MODEL_PATH, expected_features=RISK_FEATURES,
+                                     expected_type='forest_classifier', expected_version=RISK_MODEL_VERSION)
         return _risk_model
 
 # Load Isolation Forest for anomaly detection
@@ -25,7 +35,10 @@ def get_isolation_forest():
     global _isolation_forest
     with _model_lock:
         if _isolation_forest is None:
-            _isolation_forest = joblib.load(ANOMALY_MODEL_PATH)
+            from model_artifacts import load_model
+            _isolation_forest = load_model(ANOMALY_ARTIFACT_PATH, ANOMALY_MODEL_PATH,
+                                           expected_features=FRAUD_FEATURES, expected_type='isolation_forest',
+                                           expected_version=ANOMALY_MODEL_VERSION)
         return _isolation_forest
 
 # HuggingFace pipelines for text fraud detection and NLI
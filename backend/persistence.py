@@ -0,0 +1,246 @@
+import os
+import json
+import atexit
+import time
+import base64
+import logging
+import datetime
+import threading
+import importlib.util
+
+# --- Batched Firestore persistence and cached, paginated history reads ---
+# Result writes are buffered and committed with Firestore batched writes. A batch that still fails after
+# retries goes back to the front of the buffer for the next flush, so a Firestore outage delays writes
+# instead of dropping them. History reads are cursor-paginated on (created_at, document id) and served
+# from a short-TTL cache that any write to the same user's history invalidates.
+
+COMPLIANCE_COLLECTION = 'compliance_checks'
+REPORTS_COLLECTION = 'regulatory_reports'
+FRAUD_COLLECTION = 'fraud_checks'
+LOAN_RISK_COLLECTION = 'loan_risk_assessments'
+FIRESTORE_BATCH_SIZE = min(int(os.getenv('FIRESTORE_BATCH_SIZE', '50')), 500)  # Firestore allows 500 writes per batch
+FIRESTORE_FLUSH_INTERVAL = float(os.getenv('FIRESTORE_FLUSH_INTERVAL', '2.0'))
+FIRESTORE_COMMIT_RETRIES = int(os.getenv('FIRESTORE_COMMIT_RETRIES', '3'))
+FIRESTORE_RETRY_BACKOFF = float(os.getenv('FIRESTORE_RETRY_BACKOFF', '0.5'))  # seconds, doubled per retry
+HISTORY_CACHE_TTL = float(os.getenv('HISTORY_CACHE_TTL', '30'))
+HISTORY_MAX_PAGE_SIZE = 100
+
+
+def _default_firestore_client():
+    # backend/app.py shadows the backend/app/ package, so load app/firebase/db.py by path
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'firebase', 'db.py')
+    spec = importlib.util.spec_from_file_location('app_firebase_db', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.init_firestore()
+
+
+def encode_cursor(created_at, doc_id):
+    payload = json.dumps({'created_at': created_at.isoformat(), 'id': doc_id}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, doc_id) of the last document on the previous page."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.datetime.fromisoformat(payload['created_at']), str(payload['id'])
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def _after(created_at, doc_id):
+    # Documents with equal timestamps are ordered by id, so the cursor needs both fields
+    return {'created_at': created_at, '__name__': doc_id}
+
+
+class TTLCache:
+    """Small thread-safe TTL cache whose entries are grouped so a write can drop a whole group."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, group, key):
+        with self._lock:
+            entry = self._entries.get(group, {}).get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def put(self, group, key, value):
+        with self._lock:
+            self._entries.setdefault(group, {})[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, group):
+        with self._lock:
+            self._entries.pop(group, None)
+
+
+class ResultStore:
+    """
+    Buffered writer and paginated reader for per-user result collections.
+    client is a Firestore client (or anything with the same collection/batch API, e.g. the emulator).
+    """
+
+    def __init__(self, client=None, batch_size=FIRESTORE_BATCH_SIZE, flush_interval=FIRESTORE_FLUSH_INTERVAL,
+                 cache_ttl=HISTORY_CACHE_TTL, commit_retries=FIRESTORE_COMMIT_RETRIES,
+                 retry_backoff=FIRESTORE_RETRY_BACKOFF):
+        self._client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.commit_retries = commit_retries
+        self.retry_backoff = retry_backoff
+        self.cache = TTLCache(cache_ttl)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = _default_firestore_client()
+        return self._client
+
+    def add(self, collection, doc):
+        """
+        Queue a document for the next batch commit and return its id.
+        Once the document is queued add() does not raise: a failed size-triggered flush is logged and the
+        writes stay queued for the next flush.
+        """
+        doc = dict(doc)
+        doc.setdefault('created_at', datetime.datetime.now(datetime.timezone.utc))
+        ref = self.client.collection(collection).document()
+        with self._lock:
+            self._pending.append((ref, doc))
+            full = len(self._pending) >= self.batch_size
+            if not full:
+                self._schedule_flush()
+        self.cache.invalidate((collection, doc.get('user_uid')))
+        if full:
+            self._flush_quietly()
+        return ref.id
+
+    def _schedule_flush(self):
+        # Caller holds self._lock
+        if self._timer is None and self.flush_interval > 0:
+            self._timer = threading.Timer(self.flush_interval, self._flush_quietly)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _commit(self, chunk):
+        """Commit one batch, retrying with exponential backoff; set() is idempotent so a retry is safe."""
+        for attempt in range(self.commit_retries + 1):
+            batch = self.client.batch()
+            for ref, doc in chunk:
+                batch.set(ref, doc)
+            try:
+                batch.commit()
+                return
+            except Exception:
+                if attempt == self.commit_retries:
+                    raise
+                logging.warning(f'Firestore batch commit failed (attempt {attempt + 1}); retrying')
+                time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def flush(self):
+        """
+        Commit every buffered write, in batches of at most batch_size.
+        If a batch still fails after retries, it and every later batch are requeued and the error is raised.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start:start + self.batch_size]
+                try:
+                    self._commit(chunk)
+                except Exception:
+                    logging.exception(f'Failed to commit {len(chunk)} buffered Firestore writes; requeued')
+                    with self._lock:
+                        self._pending[:0] = pending[start:]
+                        self._schedule_flush()
+                    raise
+
+    def history(self, collection, user_uid, limit=10, cursor=None):
+        """
+        Return {'items': [...], 'next_cursor': str|None} for a user's documents, newest first.
+        Pending writes are flushed first so users always see their own results.
+        """
+        limit = max(1, min(int(limit), HISTORY_MAX_PAGE_SIZE))
+        key = (limit, cursor)
+        cached = self.cache.get((collection, user_uid), key)
+        if cached is not None:
+            return cached
+        self._flush_quietly()
+        query = (
+            self.client.collection(collection)
+            .where('user_uid', '==', user_uid)
+            .order_by('created_at', direction='DESCENDING')
+            .order_by('__name__', direction='DESCENDING')
+        )
+        if cursor:
+            query = query.start_after(_after(*decode_cursor(cursor)))
+        # Fetch one extra document to know whether another page exists
+        docs = list(query.limit(limit + 1).stream())
+        items = []
+        for snapshot in docs[:limit]:
+            data = snapshot.to_dict()
+            data['id'] = snapshot.id
+            items.append(data)
+        next_cursor = encode_cursor(items[-1]['created_at'], items[-1]['id']) if len(docs) > limit and items else None
+        page = {'items': items, 'next_cursor': next_cursor}
+        self.cache.put((collection, user_uid), key, page)
+        return page
+
+    def _flush_quietly(self):
+        if not self._pending:
+            return
+        try:
+            self.flush()
+        except Exception:
+            # Already logged and the writes stay queued; reads serve what Firestore has committed
+            pass
+
+    def scan(self, collection, page_size=500, start=None, end=None):
+        """
+        Yield every document of a collection, oldest first, one page at a time (for backfills and reports).
+        start/end optionally bound created_at to [start, end).
+        """
+        self._flush_quietly()
+        after = None
+        while True:
+            query = self.client.collection(collection)
+            if start is not None:
+                query = query.where('created_at', '>=', start)
+            if end is not None:
+                query = query.where('created_at', '<', end)
+            query = query.order_by('created_at', direction='ASCENDING').order_by('__name__', direction='ASCENDING')
+            if after is not None:
+                query = query.start_after(after)
+            docs = list(query.limit(page_size).stream())
+            for snapshot in docs:
+                data = snapshot.to_dict()
+                data['id'] = snapshot.id
+                yield data
+            if len(docs) < page_size:
+                return
+            after = _after(docs[-1].to_dict()['created_at'], docs[-1].id)
+
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store():
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore()
+            atexit.register(_result_store.flush)
+        return _result_store
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import logging
+import threading
+
+# Explicit preload phase for deferred models.
+# Set PRELOAD_MODELS to "all" or a comma-separated list of names below to warm models in a background
+# thread at startup, or run `python preload.py [name ...]` at deploy time to fill the download cache.
+
+PRELOAD_MODELS = os.getenv('PRELOAD_MODELS', '')
+
+
+def _getters():
+    import models
+    import models_fraud
+    import models_risk_fraud
+    return {
+        'legalbert': models.get_legalbert_pipeline,
+        'flan_t5': models.get_flan_t5_pipeline,
+        'distilbart': models.get_distilbart_pipeline,
+        'bart_mnli': models.get_bart_mnli,
+        'spam_bert': models.get_spam_bert,
+        'finbert': models_fraud.get_fraud_classifier,
+        'isolation_forest': models_fraud.get_isolation_forest,
+        'risk_model': models_risk_fraud.get_risk_model,
+    }
+
+
+def preload(names):
+    """Load the named models now; returns {name: seconds or error string}."""
+    getters = _getters()
+    if names == ['all']:
+        names = list(getters)
+    timings = {}
+    for name in names:
+        getter = getters.get(name)
+        if getter is None:
+            timings[name] = 'unknown model'
+            continue
+        started = time.perf_counter()
+        try:
+            getter()
+            timings[name] = round(time.perf_counter() - started, 3)
+            logging.info(f'Preloaded {name} in {timings[name]}s')
+        except Exception as e:
+            timings[name] = f'failed: {str(e)}'
+            logging.warning(f'Preloading {name} failed: {str(e)}')
+    return timings
+
+
+def start_preload(spec=PRELOAD_MODELS):
+    """Start preloading in a daemon thread so the server accepts requests immediately."""
+    names = [n.strip() for n in spec.split(',') if n.strip()]
+    if not names:
+        return None
+    thread = threading.Thread(target=preload, args=(names,), name='model-preload', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(preload(sys.argv[1:] or ['all']))
@@ -0,0 +1,132 @@
+import os
+import re
+import hmac
+import sys
+import time
+import random
+import logging
+import threading
+from collections import Counter
+from flask import request, g
+
+# Opt-in sampling profiler for production requests.
+# A request is profiled when it carries the admin header with the right token,
+# or when it is picked by 1-in-N sampling. Everything else pays one env lookup.
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_ADMIN_TOKEN = os.getenv('PROFILE_ADMIN_TOKEN')
+PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', '0'))  # 0 disables sampling, N = 1 in N
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000.0
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '120'))
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of one thread at a fixed interval from a daemon thread.
+    Stacks are aggregated in collapsed ("folded") format, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, target_thread_id, interval=PROFILE_INTERVAL, max_seconds=PROFILE_MAX_SECONDS, on_done=None):
+        super().__init__(daemon=True, name=f'profiler-{target_thread_id}')
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self.timed_out = False
+        self._stop_event = threading.Event()
+        self._on_done = on_done
+
+    def run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                break
+            if time.monotonic() > deadline:
+                # Still written out, marked as truncated, rather than lost with the sampler
+                self.timed_out = True
+                break
+            self.stacks[self._fold(frame)] += 1
+            self.samples += 1
+        # The request thread only signals the stop; writing happens here so the worker is never held.
+        if self._on_done is not None:
+            try:
+                self._on_done(self)
+            except Exception:
+                logging.exception('Failed to store profile')
+
+    @staticmethod
+    def _fold(frame):
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        parts.reverse()
+        return ';'.join(parts)
+
+    def stop(self, on_done=None):
+        if on_done is not None:
+            self._on_done = on_done
+        self._stop_event.set()
+
+    def folded(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+
+
+def should_profile():
+    """Decide whether the current request is profiled. Cheap when profiling is off."""
+    token = request.headers.get(PROFILE_HEADER)
+    if PROFILE_ADMIN_TOKEN and token and hmac.compare_digest(token.encode('utf-8'), PROFILE_ADMIN_TOKEN.encode('utf-8')):
+        return 'admin'
+    if PROFILE_SAMPLE_RATE > 0 and random.randrange(PROFILE_SAMPLE_RATE) == 0:
+        return 'sampled'
+    return None
+
+
+def _profile_path(endpoint, input_size, reason):
+    safe_endpoint = re.sub(r'[^A-Za-z0-9]+', '-', endpoint).strip('-') or 'root'
+    stamp = time.strftime('%Y%m%dT%H%M%S')
+    return os.path.join(PROFILE_DIR, f'{safe_endpoint}__{input_size}b__{reason}__{stamp}_{os.getpid()}_{threading.get_ident()}.folded')
+
+
+def _store_profile(sampler, endpoint, input_size, reason, started):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = _profile_path(endpoint, input_size, reason)
+    header = (
+        f'# endpoint={endpoint} input_size={input_size} reason={reason} '
+        f'samples={sampler.samples} interval_ms={sampler.interval * 1000:g} '
+        f'duration_ms={(time.monotonic() - started) * 1000:.1f} truncated={int(sampler.timed_out)}\n'
+    )
+    with open(path, 'w') as f:
+        f.write(header)
+        f.write(sampler.folded())
+        f.write('\n')
+    logging.info(f'Stored profile for {endpoint} ({sampler.samples} samples) at {path}')
+
+
+def init_profiling(app):
+    """Register the opt-in profiler on a Flask app."""
+
+    @app.before_request
+    def _start_profiler():
+        if not PROFILE_ADMIN_TOKEN and PROFILE_SAMPLE_RATE <= 0:
+            return
+        reason = should_profile()
+        if reason is None:
+            return
+        started = time.monotonic()
+        endpoint = request.path
+        input_size = request.content_length or 0
+        # The profile is stored when the request ends or when PROFILE_MAX_SECONDS runs out, whichever is first
+        sampler = StackSampler(threading.get_ident(),
+                               on_done=lambda s: _store_profile(s, endpoint, input_size, reason, started))
+        g._profiler = sampler
+        sampler.start()
+
+    @app.teardown_request
+    def _stop_profiler(exc=None):
+        sampler = g.pop('_profiler', None)
+        if sampler is not None:
+            sampler.stop()
@@ -0,0 +1,341 @@
+import os
+import re
+import csv
+import io
+import json
+import heapq
+import hashlib
+import logging
+import datetime
+import tempfile
+from collections import Counter
+from flask import Blueprint, request, jsonify, g, Response, stream_with_context, send_file
+
+from auth import verify_firebase_token
+from persistence import get_result_store, COMPLIANCE_COLLECTION, FRAUD_COLLECTION, LOAN_RISK_COLLECTION, REPORTS_COLLECTION
+
+# --- Streaming RBI report generation ---
+# Period data is read from Firestore a page at a time, merged in time order and folded into
+# fixed-size counters; per-day rows are rendered and sent as soon as each day is complete.
+# Reports for closed periods are written to REPORT_CACHE_DIR while streaming and served from disk afterwards.
+
+reporting_api = Blueprint('reporting_api', __name__)
+
+REPORT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', 'report_cache')
+REPORT_PAGE_SIZE = int(os.getenv('REPORT_PAGE_SIZE', '500'))
+REPORT_TOP_ISSUES = 10
+REPORT_FORMATS = {'json': 'application/json', 'csv': 'text/csv'}
+
+_MONTHS = {name.lower(): i for i, name in enumerate(
+    ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+     'September', 'October', 'November', 'December'], start=1)}
+
+
+def parse_period(period):
+    """
+    Parse a reporting period into a UTC [start, end) range.
+    Accepts "April 2025", "2025-04", "Q1 2025" / "2025-Q1" and "2025".
+    """
+    text = (period or '').strip()
+    utc = datetime.timezone.utc
+    m = re.fullmatch(r'([A-Za-z]+)\s+(\d{4})', text)
+    if m and m.group(1).lower() in _MONTHS:
+        year, month = int(m.group(2)), _MONTHS[m.group(1).lower()]
+        return _month_range(year, month, 1)
+    m = re.fullmatch(r'(\d{4})-(\d{1,2})', text)
+    if m:
+        return _month_range(int(m.group(1)), int(m.group(2)), 1)
+    m = re.fullmatch(r'(?:Q([1-4])\s+(\d{4})|(\d{4})-Q([1-4]))', text, re.IGNORECASE)
+    if m:
+        quarter = int(m.group(1) or m.group(4))
+        year = int(m.group(2) or m.group(3))
+        return _month_range(year, 3 * (quarter - 1) + 1, 3)
+    m = re.fullmatch(r'(\d{4})', text)
+    if m:
+        year = int(m.group(1))
+        return datetime.datetime(year, 1, 1, tzinfo=utc), datetime.datetime(year + 1, 1, 1, tzinfo=utc)
+    raise ValueError(f'Unrecognised report period: {period!r}')
+
+
+def _month_range(year, month, months):
+    if not 1 <= month <= 12:
+        raise ValueError(f'Invalid month: {month}')
+    utc = datetime.timezone.utc
+    start = datetime.datetime(year, month, 1, tzinfo=utc)
+    end_month = month - 1 + months
+    end = datetime.datetime(year + end_month // 12, end_month % 12 + 1, 1, tzinfo=utc)
+    return start, end
+
+
+class ReportAggregator:
+    """Constant-memory aggregation of period results; only the current day's counters are open."""
+
+    def __init__(self):
+        self.compliance = Counter()
+        self.issues = Counter()
+        self.loan_risk = Counter()
+        self.fraud = Counter()
+        self.clauses = 0
+        self.non_compliant_clauses = 0
+        self._day = None
+        self._day_counts = None
+
+    def _new_day(self, day):
+        self._day = day
+        self._day_counts = Counter()
+
+    def add(self, kind, doc):
+        """Fold one document in; returns the previous day's row when a new day starts."""
+        created = doc.get('created_at')
+        day = created.date().isoformat() if created else 'unknown'
+        closed = None
+        if day != self._day:
+            closed = self.close_day()
+            self._new_day(day)
+        counts = self._day_counts
+        if kind == 'compliance':
+            result = doc.get('result') or {}
+            status = result.get('overallCompliance') or doc.get('compliance_status') or 'Unknown'
+            self.compliance[status] += 1
+            counts['compliance_checks'] += 1
+            for clause in result.get('clauses') or []:
+                self.clauses += 1
+                if clause.get('status') == 'non-compliant':
+                    self.non_compliant_clauses += 1
+                    counts['non_compliant_clauses'] += 1
+                    for rule in clause.get('rules') or [{'title': clause.get('rule')}]:
+                        self.issues[rule.get('title') or 'Unknown'] += 1
+        elif kind == 'loan_risk':
+            level = str(doc.get('risk_level') or 'Unknown').capitalize()
+            self.loan_risk[level] += 1
+            counts['loan_applications'] += 1
+            counts[f'loan_risk_{level.lower()}'] += 1
+        elif kind == 'fraud':
+            level = str(doc.get('fraud_risk') or 'Unknown').capitalize()
+            self.fraud[level] += 1
+            counts['fraud_checks'] += 1
+            if level == 'High':
+                counts['fraud_detected'] += 1
+        return closed
+
+    def close_day(self):
+        if self._day is None:
+            return None
+        row = {'date': self._day, **self._day_counts}
+        self._day = None
+        self._day_counts = None
+        return row
+
+    def metrics(self):
+        total_checks = sum(self.compliance.values())
+        compliant = self.compliance.get('Compliant', 0)
+        return {
+            'complianceDistribution': {
+                'compliant': compliant,
+                'partial': self.compliance.get('Partial', 0),
+                'nonCompliant': self.compliance.get('Non-compliant', 0),
+            },
+            'riskDistribution': {
+                'low': self.loan_risk.get('Low', 0),
+                'medium': self.loan_risk.get('Medium', 0),
+                'high': self.loan_risk.get('High', 0),
+            },
+            'totalLoans': sum(self.loan_risk.values()),
+            'fraudChecks': sum(self.fraud.values()),
+            'fraudDetected': self.fraud.get('High', 0),
+            'complianceChecks': total_checks,
+            'clausesReviewed': self.clauses,
+            'nonCompliantClauses': self.non_compliant_clauses,
+            'complianceScore': round(100 * (1 - self.non_compliant_clauses / self.clauses)) if self.clauses else None,
+        }
+
+    def top_issues(self):
+        return [title for title, _ in self.issues.most_common(REPORT_TOP_ISSUES)]
+
+
+def iter_period_documents(store, start, end, page_size=REPORT_PAGE_SIZE):
+    """Merge the period's compliance, loan-risk and fraud documents into one time-ordered stream."""
+    def tagged(kind, collection):
+        for doc in store.scan(collection, page_size=page_size, start=start, end=end):
+            yield doc.get('created_at'), kind, doc
+
+    return heapq.merge(
+        tagged('compliance', COMPLIANCE_COLLECTION),
+        tagged('loan_risk', LOAN_RISK_COLLECTION),
+        tagged('fraud', FRAUD_COLLECTION),
+        key=lambda item: item[0],
+    )
+
+
+def iter_daily_rows(aggregator, documents):
+    for _, kind, doc in documents:
+        row = aggregator.add(kind, doc)
+        if row:
+            yield row
+    row = aggregator.close_day()
+    if row:
+        yield row
+
+
+def render_json(params, start, end, aggregator, rows):
+    """Yield the report as JSON text chunks; daily rows are written as they are produced."""
+    head = {
+        'reportType': params['reportType'],
+        'reportPeriod': params['reportPeriod'],
+        'periodStart': start.isoformat(),
+        'periodEnd': end.isoformat(),
+        'generatedDate': datetime.date.today().isoformat(),
+    }
+    yield json.dumps(head)[:-1] + ', "daily": ['
+    for i, row in enumerate(rows):
+        yield (', ' if i else '') + json.dumps(row)
+    metrics = aggregator.metrics()
+    tail = {
+        'report': {'metrics': metrics},
+        'rbiFormat': {
+            'institution': params['institutionName'],
+            'reportingPeriod': params['reportPeriod'],
+            'totalLoansDisbursed': metrics['totalLoans'],
+            'complianceScore': metrics['complianceScore'],
+            'nonComplianceIssues': aggregator.top_issues(),
+            'remedialMeasures': params['remedialMeasures'],
+            'certifiedBy': params['certifiedBy'],
+            'notes': params['notes'],
+        },
+    }
+    yield '], ' + json.dumps(tail)[1:]
+
+
+def render_csv(params, start, end, aggregator, rows):
+    """Yield the daily breakdown as CSV, followed by period totals."""
+    columns = ['date', 'compliance_checks', 'non_compliant_clauses', 'loan_applications',
+               'loan_risk_low', 'loan_risk_medium', 'loan_risk_high', 'fraud_checks', 'fraud_detected']
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def take():
+        chunk = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return chunk
+
+    writer.writerow(['# report', params['reportType'], params['reportPeriod'], params['institutionName']])
+    writer.writerow(columns)
+    yield take()
+    for row in rows:
+        writer.writerow([row.get(c, 0) for c in columns])
+        yield take()
+    for key, value in aggregator.metrics().items():
+        if not isinstance(value, dict):
+            writer.writerow(['# total', key, value])
+    yield take()
+
+
+RENDERERS = {'json': render_json, 'csv': render_csv}
+
+
+def _cache_path(params, fmt):
+    key = json.dumps({**params, 'format': fmt}, sort_keys=True)
+    return os.path.join(REPORT_CACHE_DIR, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.' + fmt)
+
+
+def _metrics_path(cache_path):
+    # The report's metrics sit next to the cached file so a cache hit can still be recorded
+    return cache_path + '.metrics.json'
+
+
+def _cached_stream(chunks, cache_path, aggregator):
+    """Pass chunks through while writing them to a temp file that becomes the cache entry on success."""
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=REPORT_CACHE_DIR, suffix='.part')
+    metrics_tmp = f'{tmp_path}.metrics'
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        with open(metrics_tmp, 'w', encoding='utf-8') as f:
+            json.dump(aggregator.metrics(), f)
+        os.replace(metrics_tmp, _metrics_path(cache_path))
+        os.replace(tmp_path, cache_path)
+    finally:
+        for path in (tmp_path, metrics_tmp):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _record_report(store, params, metrics, uid):
+    try:
+        store.add(REPORTS_COLLECTION, {
+            'report_type': params['reportType'],
+            'report_period': params['reportPeriod'],
+            'report_date': datetime.date.today().isoformat(),
+            'submission_status': 'generated',
+            'metrics': metrics,
+            'user_uid': uid,
+        })
+    except Exception:
+        logging.exception('Failed to record generated report')
+
+
+def generate_report_stream(params, fmt, uid, store=None, now=None):
+    """
+    Return (body, cache_hit). On a cache hit body is the cached file's path; otherwise it is an
+    iterator of text chunks, which for closed periods is also written to the cache while streaming.
+    """
+    start, end = parse_period(params['reportPeriod'])
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    closed = end <= now
+    cache_path = _cache_path(params, fmt)
+    store = store or get_result_store()
+    if closed and os.path.exists(cache_path):
+        try:
+            with open(_metrics_path(cache_path), encoding='utf-8') as f:
+                metrics = json.load(f)
+        except (OSError, ValueError):
+            metrics = None  # cached before metrics were stored alongside; regenerate below
+        if metrics is not None:
+            _record_report(store, params, metrics, uid)
+            return cache_path, True
+
+    aggregator = ReportAggregator()
+    rows = iter_daily_rows(aggregator, iter_period_documents(store, start, end))
+
+    def chunks():
+        yield from RENDERERS[fmt](params, start, end, aggregator, rows)
+        _record_report(store, params, aggregator.metrics(), uid)
+
+    stream = chunks()
+    if closed:
+        stream = _cached_stream(stream, cache_path, aggregator)
+    return stream, False
+
+
+@reporting_api.route('/api/generate-report', methods=['POST'])
+@verify_firebase_token
+def generate_report():
+    data = request.get_json() or {}
+    fmt = request.args.get('format', 'json')
+    if fmt not in RENDERERS:
+        return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+    if not data.get('reportType') or not data.get('reportPeriod'):
+        return jsonify({'error': 'Missing reportType or reportPeriod'}), 400
+    params = {
+        'reportType': data['reportType'],
+        'reportPeriod': data['reportPeriod'],
+        'institutionName': data.get('institutionName', ''),
+        'certifiedBy': data.get('certifiedBy', ''),
+        'notes': data.get('notes', ''),
+        'remedialMeasures': data.get('remedialMeasures', ''),
+    }
+    try:
+        body, cache_hit = generate_report_stream(params, fmt, g.user.get('uid'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if cache_hit:
+        # Served from disk in chunks; nothing is recomputed for a closed period
+        response = send_file(body, mimetype=REPORT_FORMATS[fmt])
+    else:
+        response = Response(stream_with_context(body), mimetype=REPORT_FORMATS[fmt])
+    response.headers['X-Report-Cache'] = 'hit' if cache_hit else 'miss'
+    return response
@@ -0,0 +1,188 @@
+import os
+import time
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from clause_packing import TokenCache, rewrite_clauses, REWRITE_PREFIX
+
+# --- On-demand clause rewrite suggestions ---
+# In deferred mode the compliance analysis returns verdicts without running FLAN-T5. Each non-compliant
+# clause carries a suggestion_id (a content hash of the clause text), and /api/clause-suggestions
+# generates rewrites for the clauses the user actually opens, batched and cached by that id.
+# With SUGGESTION_PRECOMPUTE=1 a bounded background queue fills the cache for the remaining clauses;
+# when the queue is full new work is dropped, never blocking the analysis request.
+# Generated rewrites are also written back to the near-duplicate clause index (clause_index.py), whose
+# entries from deferred analyses have no suggestion, so later near-duplicates get the rewrite inline.
+
+SUGGESTION_MODE = os.getenv('SUGGESTION_MODE', 'deferred')  # 'deferred' or 'eager'
+SUGGESTION_CACHE_SIZE = int(os.getenv('SUGGESTION_CACHE_SIZE', '10000'))
+SUGGESTION_MAX_BATCH = int(os.getenv('SUGGESTION_MAX_BATCH', '16'))
+SUGGESTION_MAX_REQUEST = int(os.getenv('SUGGESTION_MAX_REQUEST', '64'))
+SUGGESTION_PRECOMPUTE = os.getenv('SUGGESTION_PRECOMPUTE', '0') == '1'
+SUGGESTION_QUEUE_SIZE = int(os.getenv('SUGGESTION_QUEUE_SIZE', '256'))
+# How long a request waits for a rewrite another request or the background worker is generating
+SUGGESTION_WAIT_S = float(os.getenv('SUGGESTION_WAIT_S', '10'))
+
+
+def suggestion_id(text):
+    # The rewrite prompt is part of the key, so changing it invalidates old suggestions
+    return hashlib.sha256(f'{REWRITE_PREFIX}\n{text.strip()}'.encode('utf-8')).hexdigest()[:32]
+
+
+class SuggestionCache:
+    """Thread-safe LRU of suggestion_id -> rewrite."""
+
+    def __init__(self, max_size=SUGGESTION_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+_cache = SuggestionCache()
+# Ids being generated right now, so the endpoint and the background worker never rewrite the same clause twice
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def generate_suggestions(texts, pipe=None, wait_s=SUGGESTION_WAIT_S):
+    """
+    Return {suggestion_id: rewrite} for texts, generating cache misses in batches of SUGGESTION_MAX_BATCH.
+    Ids whose generation produced no rewrite map to None. Ids generated elsewhere are waited for at most
+    wait_s seconds and left out (still pending) if not done.
+    """
+    results = {}
+    mine, waiting = {}, {}
+    with _inflight_lock:
+        for text in texts:
+            key = suggestion_id(text)
+            cached = _cache.get(key)
+            if cached is not None:
+                results[key] = cached
+            elif key in _inflight:
+                waiting[key] = _inflight[key]
+            elif key not in mine:
+                mine[key] = text
+                _inflight[key] = threading.Event()
+    try:
+        if mine:
+            if pipe is None:
+                from models import get_flan_t5_pipeline
+                pipe = get_flan_t5_pipeline()
+            items = list(mine.items())
+            for start in range(0, len(items), SUGGESTION_MAX_BATCH):
+                batch = items[start:start + SUGGESTION_MAX_BATCH]
+                generated = []
+                for (key, text), rewrite in zip(batch, rewrite_clauses(pipe, [text for _, text in batch], TokenCache())):
+                    results[key] = rewrite or None
+                    if rewrite:
+                        _cache.put(key, rewrite)
+                        generated.append((text, rewrite))
+                _index_suggestions(generated)
+    finally:
+        with _inflight_lock:
+            for key in mine:
+                _inflight.pop(key).set()
+    deadline = time.monotonic() + wait_s
+    for key, event in waiting.items():
+        if not event.wait(max(0.0, deadline - time.monotonic())):
+            continue
+        # Finished but not cached: that generation failed
+        results[key] = _cache.get(key)
+    return results
+
+
+def _index_suggestions(generated):
+    """Attach new rewrites to the clause index entries they belong to, by appending an entry that supersedes them."""
+    if not generated:
+        return
+    from clause_index import get_clause_index
+    index = get_clause_index()
+    if index is None:
+        return
+    try:
+        texts, records = [], []
+        for text, rewrite in generated:
+            record, _ = index.lookup(text, count=False)
+            if record is not None and record.get('status') == 'non-compliant' and not record.get('suggestion'):
+                texts.append(text)
+                records.append({'status': record['status'], 'confidence': record['confidence'], 'suggestion': rewrite})
+        index.insert_many(texts, records)
+    except Exception:
+        logging.exception('Failed to store suggestions in the clause index')
+
+
+def cache_suggestion(text, suggestion):
+    """Remember a rewrite produced in eager mode so later requests for the same clause are free."""
+    if suggestion and not suggestion.startswith('Error'):
+        _cache.put(suggestion_id(text), suggestion)
+
+
+class PrecomputeQueue:
+    """Bounded queue drained by one daemon thread that generates suggestions ahead of the user."""
+
+    def __init__(self, max_size=SUGGESTION_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, text):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='suggestion-precompute', daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(text)
+            return True
+        except queue.Full:
+            return False
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < SUGGESTION_MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                generate_suggestions(batch)
+            except Exception:
+                logging.exception('Background suggestion generation failed')
+
+
+_precompute_queue = PrecomputeQueue()
+
+
+def attach_suggestion_handles(clause_results):
+    """Give every non-compliant clause without a rewrite a suggestion_id; fill it from the cache when possible."""
+    for clause in clause_results:
+        if clause['status'] != 'non-compliant' or clause.get('suggestion'):
+            continue
+        key = suggestion_id(clause['text'])
+        clause['suggestion_id'] = key
+        cached = _cache.get(key)
+        if cached is not None:
+            clause['suggestion'] = cached
+            clause['suggestion_status'] = 'ready'
+            continue
+        clause['suggestion_status'] = 'pending'
+        if SUGGESTION_PRECOMPUTE:
+            _precompute_queue.submit(clause['text'])
+    return clause_results
@@ -0,0 +1,27 @@
+from clause_engine import DEFAULT_RULES, INLINE_SPLIT_MIN_CHARS, RuleIndex, _split_inline_markers
+
+FILLER = 'The borrower shall repay the loan in equal monthly instalments on the due date. ' * 3
+
+
+def split(line):
+    assert len(line) >= INLINE_SPLIT_MIN_CHARS
+    return list(_split_inline_markers([line]))
+
+
+def test_long_lines_split_before_inline_markers():
+    parts = split(f'Clause 1 {FILLER} Clause 2 {FILLER}')
+    assert len(parts) == 2 and parts[1].startswith('Clause 2')
+
+
+def test_cross_references_are_not_split_whatever_the_spacing():
+    for spacing in (' ', '  ', ' \t ', '\n  '):
+        line = f'Clause 1 {FILLER} as per{spacing}Clause 4 and under{spacing}Section 2 {FILLER}'
+        assert split(line) == [line]
+
+
+def test_rule_matches_are_sliced_from_the_original_text():
+    index = RuleIndex(DEFAULT_RULES)
+    # 'İ' lower-cases to two characters, which shifts every later offset in the lower-cased text
+    text = 'İİİ The borrower pays a Penalty for Late Payment.'
+    matched = {word for rule in index.match(text) for word in rule['matched']}
+    assert matched == {'Penalty', 'Late Payment'}
@@ -0,0 +1,54 @@
+import time
+
+from dashboard_data import DashboardAggregates
+
+RESULT = {'overallCompliance': 'Non-Compliant', 'clauses': [
+    {'status': 'non-compliant', 'rules': [{'title': 'Penal Charges'}]},
+    {'status': 'compliant'},
+]}
+
+
+def worker(path):
+    # save_interval is large so the tests decide when each process saves
+    return DashboardAggregates(state_path=str(path), save_interval=3600)
+
+
+def test_workers_merge_instead_of_overwriting(tmp_path):
+    path = tmp_path / 'dashboard_state.json'
+    a, b = worker(path), worker(path)
+    a.record_compliance(RESULT)
+    b.record_fraud('high')
+    b.record_fraud('low')
+    a.save()
+    b.save()
+    a.save()
+    fresh = worker(path)
+    fresh.load()
+    for aggregates in (a, b, fresh):
+        summary = aggregates.summary()
+        assert summary['totals'] == {'compliance_checks': 1, 'clauses': 2, 'non_compliant_clauses': 1, 'fraud_checks': 2}
+        assert summary['nonCompliantByRule'] == {'Penal Charges': 1}
+        assert summary['fraudRisk'] == {'High': 1, 'Low': 1}
+
+
+def test_rebuild_is_not_overwritten_by_a_running_worker(tmp_path):
+    path = tmp_path / 'dashboard_state.json'
+    server = worker(path)
+    server.record_fraud('high')  # before the rebuild scan: the backfill counts it from Firestore
+    time.sleep(0.01)
+    started_at = time.time()
+
+    rebuilt = DashboardAggregates(state_path=None)
+    for _ in range(5):
+        rebuilt.record_fraud('high')
+    cli = worker(path)
+    cli.load()
+    cli.replace(rebuilt, started_at)
+
+    server.record_loan_risk('low')  # after the scan started: must survive the rebuild
+    server.save()
+    summary = worker(path)
+    summary.load()
+    totals = summary.summary()['totals']
+    assert totals == {'fraud_checks': 5, 'loan_risk_assessments': 1}
+    assert server.summary()['totals'] == totals
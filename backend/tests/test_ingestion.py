@@ -0,0 +1,144 @@
+import io
+import zipfile
+
+import pytest
+
+from ingestion import IngestionError, ingest_upload, detect_kind
+
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+CLAUSES = [
+    'Clause 1 The Borrower shall repay the loan in 24 monthly instalments.',
+    'Clause 2 A penalty of 2% per month shall be levied on overdue amounts.',
+]
+
+
+class Upload:
+    """The subset of werkzeug's FileStorage used by ingest_upload."""
+
+    def __init__(self, data, filename, mimetype):
+        self.stream = io.BytesIO(data)
+        self.filename = filename
+        self.mimetype = mimetype
+
+
+def make_pdf(pages):
+    pypdf = pytest.importorskip('pypdf')
+    from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+    writer = pypdf.PdfWriter()
+    font = DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+    })
+    for lines in pages:
+        page = writer.add_blank_page(width=612, height=792)
+        page[NameObject('/Resources')] = DictionaryObject({
+            NameObject('/Font'): DictionaryObject({NameObject('/F1'): writer._add_object(font)}),
+        })
+        ops = ['BT', '/F1 10 Tf', '14 TL', '40 750 Td']
+        for line in lines:
+            ops.append('(' + line.replace('(', '\\(').replace(')', '\\)') + ') Tj T*')
+        ops.append('ET')
+        content = DecodedStreamObject()
+        content.set_data('\n'.join(ops).encode('latin-1'))
+        page[NameObject('/Contents')] = writer._add_object(content)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def make_docx(paragraphs, page_break_before=()):
+    ns = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    body = []
+    for i, text in enumerate(paragraphs):
+        brk = '<w:r><w:br w:type="page"/></w:r>' if i in page_break_before else ''
+        body.append(f'<w:p>{brk}<w:r><w:t>{text}</w:t></w:r></w:p>')
+    document = f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{ns}"><w:body>{"".join(body)}</w:body></w:document>'
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        archive.writestr('[Content_Types].xml', '<Types/>')
+        archive.writestr('word/document.xml', document)
+    return buf.getvalue()
+
+
+def collect(lines, summary_text):
+    """Stand-in for analyze_clause_stream: consume the line stream, then read the summary text."""
+    return {'lines': [line for line in lines if line], 'summary': summary_text()}
+
+
+def test_pdf_pages_are_extracted_in_order():
+    data = make_pdf([[CLAUSES[0]], [CLAUSES[1]]])
+    result, document = ingest_upload(Upload(data, 'agreement.pdf', 'application/pdf'), collect, 1000)
+    assert document['document_type'] == 'pdf'
+    assert document['pages'] == 2
+    assert document['bytes'] == len(data)
+    assert [line.strip() for line in result['lines']] == CLAUSES
+    assert CLAUSES[0] in result['summary']
+
+
+def test_docx_paragraphs_and_page_breaks():
+    data = make_docx(CLAUSES + ['Clause 3 Foreclosure is free.'], page_break_before={2})
+    result, document = ingest_upload(Upload(data, 'agreement.docx', DOCX_MIME), collect, 1000)
+    assert document['document_type'] == 'docx'
+    assert document['pages'] == 2
+    assert result['lines'] == CLAUSES + ['Clause 3 Foreclosure is free.']
+
+
+def test_summary_text_is_capped():
+    data = '\n'.join(CLAUSES * 50).encode('utf-8')
+    result, _ = ingest_upload(Upload(data, 'agreement.txt', 'text/plain'), collect, 100)
+    assert len(result['summary']) == 100
+
+
+def test_oversized_body_is_rejected_with_413():
+    data = b'a' * 2048
+    with pytest.raises(IngestionError) as e:
+        ingest_upload(Upload(data, 'agreement.txt', 'text/plain'), collect, 100, max_bytes=1024)
+    assert e.value.status_code == 413
+
+
+def test_page_limit_is_enforced():
+    data = make_docx(CLAUSES * 3, page_break_before={1, 2, 3, 4, 5})
+    with pytest.raises(IngestionError) as e:
+        ingest_upload(Upload(data, 'agreement.docx', None), collect, 100, max_pages=2)
+    assert e.value.status_code == 413
+
+
+@pytest.mark.parametrize('filename, mimetype, data', [
+    ('photo.png', 'image/png', b'\x89PNG\r\n\x1a\n' + b'\x00' * 32),
+    ('archive.zip', 'application/zip', b'PK\x03\x04' + b'\x00' * 32),
+    ('notes.bin', 'application/octet-stream', b'\x00\x01\x02'),
+])
+def test_wrong_type_is_rejected_with_415(filename, mimetype, data):
+    with pytest.raises(IngestionError) as e:
+        ingest_upload(Upload(data, filename, mimetype), collect, 100)
+    assert e.value.status_code == 415
+
+
+def test_detect_kind_uses_magic_bytes_for_generic_types():
+    assert detect_kind('upload', 'application/octet-stream', b'%PDF-1.7') == 'pdf'
+    assert detect_kind('upload', None, b'PK\x03\x04') == 'docx'
+    assert detect_kind('contract.txt', None, b'Clause 1') == 'text'
+
+
+def zip_with(name, content):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as archive:
+        archive.writestr(name, content)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize('filename, mimetype, data', [
+    ('agreement.pdf', 'application/pdf', b'%PDF-1.7\nthis is not really a pdf'),
+    ('agreement.docx', DOCX_MIME, b'PK\x03\x04 truncated zip'),
+    ('agreement.docx', DOCX_MIME, zip_with('word/styles.xml', '<styles/>')),
+    ('agreement.docx', DOCX_MIME, zip_with('word/document.xml', '<w:document><w:body><w:p>')),
+])
+def test_corrupt_file_is_rejected_with_400(filename, mimetype, data):
+    if filename.endswith('.pdf'):
+        pytest.importorskip('pypdf')
+    with pytest.raises(IngestionError) as e:
+        ingest_upload(Upload(data, filename, mimetype), collect, 100)
+    assert e.value.status_code == 400
@@ -0,0 +1,159 @@
+import time
+import datetime
+
+import pytest
+
+from benchmarks.stubs import FakeFirestore
+from persistence import ResultStore, decode_cursor
+
+COLLECTION = 'compliance_checks'
+T0 = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class FlakyFirestore(FakeFirestore):
+    """FakeFirestore whose next `failures` batch commits raise; counts successful commits."""
+
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+        self.commits = 0
+
+    def batch(self):
+        batch = super().batch()
+        commit = batch.commit
+
+        def flaky_commit():
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError('Firestore unavailable')
+            commit()
+            self.commits += 1
+        batch.commit = flaky_commit
+        return batch
+
+
+def stored(client):
+    return client._store.get(COLLECTION, {})
+
+
+def make_store(client, **kwargs):
+    kwargs.setdefault('flush_interval', 0)
+    kwargs.setdefault('retry_backoff', 0)
+    return ResultStore(client=client, **kwargs)
+
+
+def test_writes_are_committed_in_batches_of_batch_size():
+    client = FlakyFirestore()
+    store = make_store(client, batch_size=3)
+    for i in range(7):
+        store.add(COLLECTION, {'user_uid': 'u1', 'n': i})
+    # Two full batches flushed on size; the seventh write waits for the next flush
+    assert client.commits == 2
+    assert len(stored(client)) == 6
+    store.flush()
+    assert client.commits == 3
+    assert sorted(d['n'] for d in stored(client).values()) == list(range(7))
+
+
+def test_flush_on_interval():
+    client = FlakyFirestore()
+    store = make_store(client, batch_size=100, flush_interval=0.05)
+    store.add(COLLECTION, {'user_uid': 'u1'})
+    assert not stored(client)
+    deadline = time.monotonic() + 2
+    while not stored(client) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(stored(client)) == 1
+
+
+def test_failed_commit_is_retried():
+    client = FlakyFirestore(failures=2)
+    store = make_store(client, batch_size=100, commit_retries=2)
+    store.add(COLLECTION, {'user_uid': 'u1'})
+    store.flush()
+    assert len(stored(client)) == 1
+
+
+def test_failed_commit_is_requeued_not_dropped():
+    client = FlakyFirestore(failures=1)
+    store = make_store(client, batch_size=2, commit_retries=0)
+    for i in range(3):
+        store._pending.append((client.collection(COLLECTION).document(), {'user_uid': 'u1', 'n': i, 'created_at': T0}))
+    with pytest.raises(RuntimeError):
+        store.flush()
+    # The failed batch and the one after it are back in the buffer, in order
+    assert [doc['n'] for _, doc in store._pending] == [0, 1, 2]
+    store.flush()
+    assert sorted(d['n'] for d in stored(client).values()) == [0, 1, 2]
+    assert not store._pending
+
+
+def test_add_does_not_raise_when_its_flush_fails():
+    client = FlakyFirestore(failures=1)
+    store = make_store(client, batch_size=2, commit_retries=0)
+    ids = [store.add(COLLECTION, {'user_uid': 'u1', 'n': i}) for i in range(2)]
+    # The size-triggered flush failed, but both writes were queued and are committed by the next flush
+    assert all(ids) and len(store._pending) == 2
+    store.flush()
+    assert sorted(d['n'] for d in stored(client).values()) == [0, 1]
+
+
+def test_history_survives_a_failed_flush():
+    client = FlakyFirestore(failures=1)
+    store = make_store(client, batch_size=100, commit_retries=0)
+    store.add(COLLECTION, {'user_uid': 'u1'})
+    assert store.history(COLLECTION, 'u1')['items'] == []
+    assert len(store._pending) == 1
+
+
+def test_write_invalidates_only_that_users_cached_history():
+    client = FlakyFirestore()
+    store = make_store(client, batch_size=100)
+    store.add(COLLECTION, {'user_uid': 'u1', 'created_at': T0})
+    store.add(COLLECTION, {'user_uid': 'u2', 'created_at': T0})
+    assert len(store.history(COLLECTION, 'u1')['items']) == 1
+    assert len(store.history(COLLECTION, 'u2')['items']) == 1
+    store.add(COLLECTION, {'user_uid': 'u1', 'created_at': T0 + datetime.timedelta(seconds=1)})
+    assert store.cache.get((COLLECTION, 'u1'), (10, None)) is None
+    assert store.cache.get((COLLECTION, 'u2'), (10, None)) is not None
+    assert len(store.history(COLLECTION, 'u1')['items']) == 2
+
+
+def test_history_pages_through_equal_timestamps():
+    client = FlakyFirestore()
+    store = make_store(client, batch_size=100)
+    ids = {store.add(COLLECTION, {'user_uid': 'u1', 'created_at': T0}) for _ in range(7)}
+    store.add(COLLECTION, {'user_uid': 'u2', 'created_at': T0})
+    seen, cursor = [], None
+    while True:
+        page = store.history(COLLECTION, 'u1', limit=3, cursor=cursor)
+        seen.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+        assert decode_cursor(cursor) == (T0, seen[-1])
+    assert len(seen) == 7 and set(seen) == ids
+
+
+def test_history_is_newest_first():
+    client = FlakyFirestore()
+    store = make_store(client, batch_size=100)
+    for i in range(3):
+        store.add(COLLECTION, {'user_uid': 'u1', 'n': i, 'created_at': T0 + datetime.timedelta(seconds=i)})
+    assert [item['n'] for item in store.history(COLLECTION, 'u1')['items']] == [2, 1, 0]
+
+
+def test_scan_pages_through_equal_timestamps_oldest_first():
+    client = FlakyFirestore()
+    store = make_store(client, batch_size=100)
+    for i in range(5):
+        store.add(COLLECTION, {'user_uid': 'u1', 'n': i, 'created_at': T0})
+    store.add(COLLECTION, {'user_uid': 'u1', 'n': 5, 'created_at': T0 - datetime.timedelta(seconds=1)})
+    docs = list(store.scan(COLLECTION, page_size=2))
+    assert len(docs) == 6 and len({d['id'] for d in docs}) == 6
+    assert docs[0]['n'] == 5
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
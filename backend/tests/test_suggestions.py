@@ -0,0 +1,75 @@
+import time
+import threading
+
+import pytest
+
+import suggestions
+from benchmarks.stubs import StubPipeline
+from suggestions import generate_suggestions, suggestion_id
+
+CLAUSE = 'The Lender reserves the right to change the interest rate at any time without prior notice to the Borrower.'
+
+
+@pytest.fixture
+def pipe():
+    return StubPipeline('text2text-generation')
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(suggestions, '_cache', suggestions.SuggestionCache())
+    monkeypatch.setattr(suggestions, '_inflight', {})
+
+
+@pytest.fixture
+def index(monkeypatch):
+    clause_index = pytest.importorskip('clause_index')
+    index = clause_index.ClauseIndex(path=None)
+    monkeypatch.setattr(clause_index, 'CLAUSE_INDEX_ENABLED', True)
+    monkeypatch.setattr(clause_index, '_clause_index', index)
+    return index
+
+
+def test_generates_and_caches(pipe, monkeypatch):
+    monkeypatch.setattr('clause_index.CLAUSE_INDEX_ENABLED', False, raising=False)
+    first = generate_suggestions([CLAUSE, CLAUSE], pipe=pipe)
+    assert list(first) == [suggestion_id(CLAUSE)]
+    assert generate_suggestions([CLAUSE], pipe=None) == first  # served from the cache, no pipeline needed
+
+
+def test_wait_for_another_generation_is_bounded(pipe):
+    key = suggestion_id(CLAUSE)
+    suggestions._inflight[key] = threading.Event()  # being generated elsewhere and never finishing
+    started = time.monotonic()
+    assert generate_suggestions([CLAUSE], pipe=pipe, wait_s=0.05) == {}
+    assert time.monotonic() - started < 1
+
+
+def test_failed_generation_is_reported_not_left_pending(monkeypatch):
+    monkeypatch.setattr(suggestions, 'rewrite_clauses', lambda pipe, texts, cache: [None for _ in texts])
+    key = suggestion_id(CLAUSE)
+    assert generate_suggestions([CLAUSE], pipe=object()) == {key: None}
+    assert not suggestions._inflight
+
+
+def test_waiting_on_a_failed_generation_reports_it(pipe):
+    key = suggestion_id(CLAUSE)
+    done = threading.Event()
+    done.set()  # finished elsewhere without caching a rewrite
+    suggestions._inflight[key] = done
+    assert generate_suggestions([CLAUSE], pipe=pipe, wait_s=0.05) == {key: None}
+
+
+def test_rewrite_is_written_back_to_the_clause_index(pipe, index):
+    index.insert(CLAUSE, {'status': 'non-compliant', 'confidence': 0.7, 'suggestion': None})
+    generated = generate_suggestions([CLAUSE], pipe=pipe)
+    record, similarity = index.lookup(CLAUSE)
+    assert similarity == 1.0
+    assert record['suggestion'] == generated[suggestion_id(CLAUSE)]
+    assert record['status'] == 'non-compliant' and record['confidence'] == 0.7
+
+
+def test_compliant_index_entries_are_left_alone(pipe, index):
+    index.insert(CLAUSE, {'status': 'compliant', 'confidence': 0.9, 'suggestion': None})
+    generate_suggestions([CLAUSE], pipe=pipe)
+    assert len(index) == 1
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+import velocity
+from velocity import VelocityEngine, VELOCITY_FEATURES
+
+NOW = 1_700_000_000.0
+
+
+def observe_many(engine, n=50):
+    for i in range(n):
+        engine.observe(applicant=f'user{i % 7}', device=f'device{i % 5}', ip=f'ip{i % 3}',
+                       amount=1000 * (i % 4), location=f'city{i % 2}', now=NOW + i * 60)
+
+
+def test_snapshot_round_trip(tmp_path):
+    engine = VelocityEngine(state_path=str(tmp_path / 'velocity_state.bin'))
+    observe_many(engine)
+    engine.save()
+    restored = VelocityEngine(state_path=engine.state_path)
+    restored.load()
+    probe = dict(applicant='user3', device='device1', ip='ip0', amount=5, location='city1', now=NOW + 3600)
+    assert restored.observe(**probe) == engine.observe(**probe)
+
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    engine = VelocityEngine(state_path=str(tmp_path / 'velocity_state.bin'))
+    observe_many(engine)
+    errors = []
+
+    def save():
+        try:
+            engine.save()
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert [p.name for p in tmp_path.iterdir()] == ['velocity_state.bin']
+    VelocityEngine(state_path=engine.state_path).load()
+
+
+def test_load_rejects_other_formats(tmp_path):
+    path = tmp_path / 'velocity_state.bin'
+    path.write_text('{"entities": {}}')
+    with pytest.raises(ValueError):
+        VelocityEngine(state_path=str(path)).load()
+
+
+class VelocityModel:
+    """Anomaly model trained on FRAUD_FEATURES + VELOCITY_FEATURES; records the rows it scores."""
+
+    def __init__(self, feature_names):
+        self.feature_names = feature_names
+        self.rows = []
+
+    def decision_function(self, X):
+        self.rows.extend(X.tolist())
+        return [-0.2]
+
+    def predict(self, X):
+        return [-1]
+
+
+def test_velocity_features_reach_a_model_trained_with_them(monkeypatch):
+    pytest.importorskip('numpy')
+    models_fraud = pytest.importorskip('models_fraud')
+    model = VelocityModel(models_fraud.ANOMALY_FEATURES)
+    monkeypatch.setattr(models_fraud, '_isolation_forest', model)
+    monkeypatch.setattr(velocity, '_engine', VelocityEngine(state_path=None))
+    tabular = {'email': 'a@example.com', 'ipAddress': '10.0.0.1', 'loanAmount': 50000,
+               'age': 30, 'income': 600000, 'credit_score': 700, 'existing_loans': 1, 'loan_amount': 50000}
+    features = velocity.observe_application(tabular)
+    result = models_fraud.detect_fraud_advanced(tabular, None, features)
+    assert result['anomaly_error'] is None and result['is_anomaly'] is True
+    assert model.rows[0][len(models_fraud.FRAUD_FEATURES):] == [float(features[k]) for k in VELOCITY_FEATURES]
+
+
+def test_synthetic_training_matrix_has_the_velocity_columns():
+    from benchmarks.generators import synthetic_anomaly_matrix, FRAUD_FEATURES
+    rows = synthetic_anomaly_matrix(200)
+    assert len(rows) == 200 and all(len(r) == len(FRAUD_FEATURES) + len(VELOCITY_FEATURES) for r in rows)
+    # Repeat applicants / devices / IPs make the counters vary
+    assert len({tuple(r[len(FRAUD_FEATURES):]) for r in rows}) > 10
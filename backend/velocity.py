@@ -0,0 +1,344 @@
+import os
+import time
+import zlib
+import struct
+import atexit
+import hashlib
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+
+# --- Streaming velocity features for fraud scoring ---
+# Every fraud check is recorded against its applicant, device and IP address. Each entity keeps
+# 60 one-minute and 24 one-hour counter slots in a ring buffer plus a small bounded "distinct values"
+# table, so memory per entity is fixed and reading the features costs the same for every request.
+# Entity keys and tracked values are hashed, so neither memory nor snapshots hold raw emails or IPs.
+# A background thread snapshots the state to VELOCITY_STATE_PATH (zlib-compressed binary records) every
+# VELOCITY_SAVE_INTERVAL seconds, copying entities a chunk at a time so requests are never held up; the
+# snapshot is restored on startup.
+# The counters live in process memory, so the server must run a single worker process (threads are fine):
+# with several workers each would see only its share of the traffic, and their snapshots would
+# overwrite one another in VELOCITY_STATE_PATH.
+
+VELOCITY_STATE_PATH = os.getenv('VELOCITY_STATE_PATH', 'velocity_state.bin')
+VELOCITY_MAX_ENTITIES = int(os.getenv('VELOCITY_MAX_ENTITIES', '100000'))  # per entity kind, least recently seen evicted
+VELOCITY_DISTINCT_CAP = int(os.getenv('VELOCITY_DISTINCT_CAP', '32'))  # distinct counts saturate here
+VELOCITY_SAVE_INTERVAL = float(os.getenv('VELOCITY_SAVE_INTERVAL', '30'))
+
+HOUR = 3600
+DAY = 24 * HOUR
+ENTITY_KINDS = ('applicant', 'device', 'ip')
+# Which other attributes are tracked as distinct values for each entity kind
+DISTINCT_DIMENSIONS = {
+    'applicant': ('amount', 'ip', 'device', 'location'),
+    'device': ('applicant',),
+    'ip': ('applicant',),
+}
+VELOCITY_FEATURES = [
+    'applicant_apps_1h', 'applicant_apps_24h', 'applicant_distinct_amounts_24h',
+    'applicant_distinct_ips_1h', 'applicant_distinct_devices_24h', 'applicant_distinct_locations_1h',
+    'device_apps_1h', 'device_distinct_applicants_24h',
+    'ip_apps_1h', 'ip_distinct_applicants_24h',
+]
+
+# Snapshot layout (after the magic line, zlib-compressed): saved_at, then per entity kind a run of chunks,
+# each an entity count followed by that many entities, ended by a zero count. An entity is its key,
+# its RingCounter and, per distinct dimension, a value count and (value, last seen) pairs.
+_SNAPSHOT_MAGIC = b'VELOCITY1\n'
+_SNAPSHOT_CHUNK = 2000  # entities copied per hold of the engine lock
+_COUNT = struct.Struct('<I')
+_DISTINCT_COUNT = struct.Struct('<H')
+_RING = struct.Struct('<8sqq')  # entity key, minute, hour
+_SEEN = struct.Struct('<8sd')  # value digest, last seen
+
+
+def _digest(value):
+    return hashlib.blake2b(str(value).strip().lower().encode('utf-8'), digest_size=8).hexdigest()
+
+
+class RingCounter:
+    """Event counts for the last hour (60 x 1-minute slots) and last day (24 x 1-hour slots)."""
+
+    __slots__ = ('minutes', 'hours', 'minute', 'hour', 'hour_total', 'day_total')
+
+    def __init__(self):
+        self.minutes = array('I', [0]) * 60
+        self.hours = array('I', [0]) * 24
+        self.minute = None
+        self.hour = None
+        self.hour_total = 0
+        self.day_total = 0
+
+    def _advance(self, now):
+        minute, hour = int(now // 60), int(now // HOUR)
+        if self.minute is None:
+            self.minute, self.hour = minute, hour
+            return
+        # At most 60 / 24 slots are cleared, however long the entity was idle
+        for m in range(self.minute + 1, min(minute, self.minute + 60) + 1):
+            self.hour_total -= self.minutes[m % 60]
+            self.minutes[m % 60] = 0
+        for h in range(self.hour + 1, min(hour, self.hour + 24) + 1):
+            self.day_total -= self.hours[h % 24]
+            self.hours[h % 24] = 0
+        self.minute, self.hour = max(minute, self.minute), max(hour, self.hour)
+
+    def add(self, now):
+        self._advance(now)
+        self.minutes[self.minute % 60] += 1
+        self.hours[self.hour % 24] += 1
+        self.hour_total += 1
+        self.day_total += 1
+
+    def counts(self, now):
+        self._advance(now)
+        return self.hour_total, self.day_total
+
+    def pack(self, key):
+        return b''.join((
+            _RING.pack(key, -1 if self.minute is None else self.minute, -1 if self.hour is None else self.hour),
+            self.minutes.tobytes(), self.hours.tobytes(),
+        ))
+
+    @classmethod
+    def unpack_from(cls, view, pos):
+        """Return (key, counter, new position)."""
+        key, minute, hour = _RING.unpack_from(view, pos)
+        pos += _RING.size
+        counter = cls()
+        counter.minute, counter.hour = (minute, hour) if minute >= 0 else (None, None)
+        for name, slots in (('minutes', 60), ('hours', 24)):
+            values = array('I')
+            values.frombytes(view[pos:pos + slots * values.itemsize])
+            pos += slots * values.itemsize
+            setattr(counter, name, values)
+        counter.hour_total = sum(counter.minutes)
+        counter.day_total = sum(counter.hours)
+        return key, counter, pos
+
+
+class DistinctTracker:
+    """Most recently seen distinct values with their last-seen time, at most VELOCITY_DISTINCT_CAP of them."""
+
+    __slots__ = ('seen',)
+
+    def __init__(self):
+        self.seen = OrderedDict()
+
+    def add(self, value, now):
+        self.seen.pop(value, None)
+        self.seen[value] = now
+        while len(self.seen) > VELOCITY_DISTINCT_CAP or next(iter(self.seen.values())) < now - DAY:
+            self.seen.popitem(last=False)
+
+    def count(self, now, window):
+        n = 0
+        for seen_at in reversed(self.seen.values()):
+            if seen_at < now - window:
+                break
+            n += 1
+        return n
+
+
+class EntityWindow:
+    __slots__ = ('counter', 'distinct')
+
+    def __init__(self, kind):
+        self.counter = RingCounter()
+        self.distinct = {dim: DistinctTracker() for dim in DISTINCT_DIMENSIONS[kind]}
+
+
+class VelocityEngine:
+    """Sliding-window velocity counters per applicant, device and IP, with snapshot/restore."""
+
+    def __init__(self, state_path=VELOCITY_STATE_PATH, max_entities=VELOCITY_MAX_ENTITIES, save_interval=VELOCITY_SAVE_INTERVAL):
+        self.state_path = state_path
+        self.max_entities = max_entities
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entities = {kind: OrderedDict() for kind in ENTITY_KINDS}
+        self._dirty = False
+        self._saver = None
+
+    def _entity(self, kind, key):
+        entities = self._entities[kind]
+        entity = entities.get(key)
+        if entity is None:
+            entity = entities[key] = EntityWindow(kind)
+            if len(entities) > self.max_entities:
+                entities.popitem(last=False)
+        else:
+            entities.move_to_end(key)
+        return entity
+
+    def observe(self, applicant=None, device=None, ip=None, amount=None, location=None, now=None):
+        """Record one application and return the velocity features including it."""
+        now = time.time() if now is None else now
+        keys = {kind: _digest(value) for kind, value in (('applicant', applicant), ('device', device), ('ip', ip)) if value}
+        values = {'amount': amount, 'location': location}
+        values.update(keys)
+        features = dict.fromkeys(VELOCITY_FEATURES, 0)
+        with self._lock:
+            for kind, key in keys.items():
+                entity = self._entity(kind, key)
+                entity.counter.add(now)
+                for dim, tracker in entity.distinct.items():
+                    if values.get(dim) not in (None, ''):
+                        tracker.add(values[dim] if dim in keys else _digest(values[dim]), now)
+                apps_1h, apps_24h = entity.counter.counts(now)
+                features[f'{kind}_apps_1h'] = apps_1h
+                if kind == 'applicant':
+                    features['applicant_apps_24h'] = apps_24h
+                    features['applicant_distinct_amounts_24h'] = entity.distinct['amount'].count(now, DAY)
+                    features['applicant_distinct_ips_1h'] = entity.distinct['ip'].count(now, HOUR)
+                    features['applicant_distinct_devices_24h'] = entity.distinct['device'].count(now, DAY)
+                    features['applicant_distinct_locations_1h'] = entity.distinct['location'].count(now, HOUR)
+                else:
+                    features[f'{kind}_distinct_applicants_24h'] = entity.distinct['applicant'].count(now, DAY)
+            self._dirty = True
+        return features
+
+    # --- Snapshot to / restore from disk ---
+    def _pack_chunks(self, kind):
+        """Yield (count, bytes) for the entities of one kind, holding the engine lock for one chunk at a time."""
+        with self._lock:
+            keys = list(self._entities[kind])
+        dims = DISTINCT_DIMENSIONS[kind]
+        for start in range(0, len(keys), _SNAPSHOT_CHUNK):
+            parts = []
+            count = 0
+            with self._lock:
+                entities = self._entities[kind]
+                for key in keys[start:start + _SNAPSHOT_CHUNK]:
+                    entity = entities.get(key)
+                    if entity is None:  # evicted since the keys were listed
+                        continue
+                    count += 1
+                    parts.append(entity.counter.pack(bytes.fromhex(key)))
+                    for dim in dims:
+                        seen = entity.distinct[dim].seen
+                        parts.append(_DISTINCT_COUNT.pack(len(seen)))
+                        parts.extend(_SEEN.pack(bytes.fromhex(value), seen_at) for value, seen_at in seen.items())
+            if count:
+                yield count, b''.join(parts)
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self._save_lock:
+            # Cleared first: updates made while the snapshot is written mark the engine dirty again
+            self._dirty = False
+            tmp_path = f'{self.state_path}.{os.getpid()}.tmp'
+            try:
+                compressor = zlib.compressobj(1)
+                with open(tmp_path, 'wb') as f:
+                    f.write(_SNAPSHOT_MAGIC)
+                    f.write(compressor.compress(struct.pack('<d', time.time())))
+                    for kind in ENTITY_KINDS:
+                        for count, data in self._pack_chunks(kind):
+                            f.write(compressor.compress(_COUNT.pack(count) + data))
+                        f.write(compressor.compress(_COUNT.pack(0)))
+                    f.write(compressor.flush())
+                os.replace(tmp_path, self.state_path)
+            except Exception:
+                self._dirty = True
+                raise
+
+    def load(self):
+        if not (self.state_path and os.path.exists(self.state_path)):
+            return
+        with open(self.state_path, 'rb') as f:
+            if f.read(len(_SNAPSHOT_MAGIC)) != _SNAPSHOT_MAGIC:
+                raise ValueError(f'{self.state_path} is not a velocity snapshot')
+            view = memoryview(zlib.decompress(f.read()))
+        pos = 8  # saved_at
+        loaded = {kind: OrderedDict() for kind in ENTITY_KINDS}
+        for kind in ENTITY_KINDS:
+            while True:
+                (count,) = _COUNT.unpack_from(view, pos)
+                pos += _COUNT.size
+                if not count:
+                    break
+                for _ in range(count):
+                    entity = EntityWindow(kind)
+                    key, entity.counter, pos = RingCounter.unpack_from(view, pos)
+                    for dim in DISTINCT_DIMENSIONS[kind]:
+                        (n,) = _DISTINCT_COUNT.unpack_from(view, pos)
+                        pos += _DISTINCT_COUNT.size
+                        seen = entity.distinct[dim].seen
+                        for _ in range(n):
+                            value, seen_at = _SEEN.unpack_from(view, pos)
+                            pos += _SEEN.size
+                            seen[value.hex()] = seen_at
+                    loaded[kind][key.hex()] = entity
+        with self._lock:
+            self._entities = loaded
+
+    def start_snapshots(self):
+        """Save every save_interval seconds from a daemon thread, off the request path."""
+        if not self.state_path or self._saver is not None:
+            return
+        self._saver = threading.Thread(target=self._snapshot_loop, name='velocity-snapshot', daemon=True)
+        self._saver.start()
+
+    def _snapshot_loop(self):
+        while True:
+            time.sleep(self.save_interval)
+            if self._dirty:
+                try:
+                    self.save()
+                except Exception:
+                    logging.exception('Failed to save velocity state')
+
+
+# Rule thresholds for the anomalies reported alongside the model score
+VELOCITY_RULES = [
+    ('applicant_distinct_ips_1h', 3, 'Multiple IP Addresses', 'Applicant seen from {value} IP addresses in the last hour.', 'High'),
+    ('applicant_distinct_locations_1h', 2, 'Unusual Login Pattern', 'Applications from {value} different locations in the last hour.', 'Medium'),
+    ('applicant_apps_1h', 3, 'Application Velocity', '{value} applications from this applicant in the last hour.', 'Medium'),
+    ('applicant_distinct_amounts_24h', 3, 'Amount Probing', '{value} different loan amounts requested in the last 24 hours.', 'Medium'),
+    ('device_distinct_applicants_24h', 3, 'Shared Device', 'Device used by {value} applicants in the last 24 hours.', 'High'),
+    ('ip_distinct_applicants_24h', 5, 'Shared IP Address', 'IP address used by {value} applicants in the last 24 hours.', 'Medium'),
+]
+
+
+def velocity_anomalies(features):
+    return [
+        {'type': title, 'description': description.format(value=features[name]), 'impact': impact}
+        for name, threshold, title, description, impact in VELOCITY_RULES
+        if features.get(name, 0) >= threshold
+    ]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_velocity_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = VelocityEngine()
+            try:
+                _engine.load()
+            except Exception:
+                logging.exception('Failed to restore velocity state; starting empty')
+            _engine.start_snapshots()
+            atexit.register(_engine.save)
+        return _engine
+
+
+def observe_application(tabular):
+    """
+    Record a fraud-check request body from FraudDetection.tsx and return its velocity features.
+    Only the applicant's IP from the body is counted; the caller's address is the analyst's, not the applicant's.
+    """
+    return get_velocity_engine().observe(
+        applicant=tabular.get('email') or tabular.get('phone') or tabular.get('applicant_id'),
+        device=tabular.get('deviceId') or tabular.get('device_id'),
+        ip=tabular.get('ipAddress') or tabular.get('ip_address'),
+        amount=tabular.get('loanAmount') or tabular.get('loan_amount') or tabular.get('amount_requested'),
+        location=tabular.get('location'),
+    )
@@ -3,6 +3,7 @@ import React, { useState } from 'react';
 import { Button } from '@/components/ui/button';
 import { ChevronDown, ChevronUp, AlertTriangle, CheckCircle, Copy } from 'lucide-react';
 import { toast } from 'sonner';
+import { auth } from '@/firebase';
 
 interface Clause {
   id: number;
@@ -10,6 +11,8 @@ interface Clause {
   status: string;
   rule?: string;
   suggestion?: string;
+  suggestion_id?: string;
+  suggestion_status?: 'pending' | 'ready' | 'error';
   confidence?: number;
 }
 
@@ -19,12 +22,56 @@ interface ClauseAnalysisProps {
 
 const ClauseAnalysis: React.FC<ClauseAnalysisProps> = ({ clauses }) => {
   const [expandedClauses, setExpandedClauses] = useState<number[]>([]);
+  // Rewrites fetched on demand for clauses analyzed in deferred mode, keyed by suggestion_id
+  const [fetchedSuggestions, setFetchedSuggestions] = useState<Record<string, string>>({});
+  const [loadingSuggestions, setLoadingSuggestions] = useState<string[]>([]);
 
-  const toggleClause = (id: number) => {
+  const suggestionFor = (clause: Clause) =>
+    clause.suggestion || (clause.suggestion_id ? fetchedSuggestions[clause.suggestion_id] : undefined);
+
+  const fetchSuggestion = async (clause: Clause) => {
+    const suggestionId = clause.suggestion_id!;
+    setLoadingSuggestions(prev => [...prev, suggestionId]);
+    try {
+      const user = auth.currentUser;
+      if (!user) throw new Error('User not authenticated');
+      const idToken = await user.getIdToken();
+      const response = await fetch('http://localhost:5001/api/clause-suggestions', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${idToken}`
+        },
+        body: JSON.stringify({ clauses: [{ suggestion_id: suggestionId, text: clause.text }] })
+      });
+      if (!response.ok) throw new Error(`Error from API: ${response.status}`);
+      const result = await response.json();
+      const suggestion = result.suggestions?.[0]?.suggestion;
+      if (suggestion) {
+        setFetchedSuggestions(prev => ({ ...prev, [suggestionId]: suggestion }));
+      } else if (result.suggestions?.[0]?.suggestion_status === 'pending') {
+        toast.info('The suggestion is still being generated; open the clause again in a moment');
+      } else {
+        toast.error('No suggestion could be generated for this clause');
+      }
+    } catch (error) {
+      console.error('Error fetching suggestion:', error);
+      toast.error('Failed to generate suggestion');
+    } finally {
+      setLoadingSuggestions(prev => prev.filter(id => id !== suggestionId));
+    }
+  };
+
+  const toggleClause = (clause: Clause) => {
+    const id = clause.id;
     if (expandedClauses.includes(id)) {
       setExpandedClauses(expandedClauses.filter(clauseId => clauseId !== id));
     } else {
       setExpandedClauses([...expandedClauses, id]);
+      if (clause.status === 'non-compliant' && clause.suggestion_id && !suggestionFor(clause)
+          && !loadingSuggestions.includes(clause.suggestion_id)) {
+        fetchSuggestion(clause);
+      }
     }
   };
 
@@ -58,7 +105,7 @@ const ClauseAnalysis: React.FC<ClauseAnalysisProps> = ({ clauses }) => {
         <div>
           {clauses.map((clause) => (
             <div key={clause.id} className={`border rounded-lg ${clause.status === 'compliant' ? 'border-l-4 border-l-green-500' : 'border-l-4 border-l-red-500'}`}>
-              <div className="p-4 cursor-pointer hover:bg-gray-50" onClick={() => toggleClause(clause.id)}>
+              <div className="p-4 cursor-pointer hover:bg-gray-50" onClick={() => toggleClause(clause)}>
                 <div className="flex justify-between items-start mb-2">
                   <div className="flex items-center space-x-2">
                     {clause.status === 'compliant' ? (
@@ -82,7 +129,11 @@ const ClauseAnalysis: React.FC<ClauseAnalysisProps> = ({ clauses }) => {
                   <div className="text-xs text-gray-500 mb-2">
                     <span className="font-medium">Reference:</span> {clause.rule || 'General RBI Guidelines'}
                   </div>
-                  {clause.status === 'non-compliant' && clause.suggestion && (
+                  {clause.status === 'non-compliant' && clause.suggestion_id && !suggestionFor(clause)
+                    && loadingSuggestions.includes(clause.suggestion_id) && (
+                    <div className="mt-3 border-t pt-3 text-xs text-gray-500 italic">Generating suggested compliant alternative...</div>
+                  )}
+                  {clause.status === 'non-compliant' && suggestionFor(clause) && (
                     <div className="mt-3 border-t pt-3">
                       <div className="flex justify-between items-center mb-1">
                         <div className="text-xs font-medium text-primary">Suggested Compliant Alternative:</div>
@@ -92,7 +143,7 @@ const ClauseAnalysis: React.FC<ClauseAnalysisProps> = ({ clauses }) => {
                           className="h-6 p-0 text-gray-500"
                           onClick={(e) => {
                             e.stopPropagation();
-                            copySuggestion(clause.suggestion!);
+                            copySuggestion(suggestionFor(clause)!);
                           }}
                         >
                           <Copy className="h-3.5 w-3.5 mr-1" />
@@ -100,7 +151,7 @@ const ClauseAnalysis: React.FC<ClauseAnalysisProps> = ({ clauses }) => {
                         </Button>
                       </div>
                       <p className="text-sm text-gray-700 p-2 bg-primary/5 rounded border border-primary/10">
-                        {clause.suggestion}
+                        {suggestionFor(clause)}
                       </p>
                     </div>
                   )}
@@ -13,9 +13,7 @@ import ComplianceResults from '@/components/compliance/ComplianceResults';
 import ComplianceHistory from '@/components/compliance/ComplianceHistory';
 
 const ComplianceAuditor = () => {
-  const [fileContent, setFileContent] = useState<string>('');
-  const [fileName, setFileName] = useState<string>('');
-  const [fileType, setFileType] = useState<string>('');
+  const [file, setFile] = useState<File | null>(null);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [analysisCompleted, setAnalysisCompleted] = useState(false);
   const [complianceResults, setComplianceResults] = useState<any>(null);
@@ -25,26 +23,26 @@ const ComplianceAuditor = () => {
     fetchComplianceHistory();
   }, [analysisCompleted]);
 
-  // Migrate: Fetch compliance history from Firestore instead of Supabase
+  // Compliance history is served (paginated and cached) by the backend
   const fetchComplianceHistory = async () => {
     try {
-      // Import Firestore functions
-      const { db } = await import('../firebase');
-      const { collection, getDocs, orderBy, limit, query } = await import('firebase/firestore');
-      const q = query(collection(db, 'compliance_checks'), orderBy('created_at', 'desc'), limit(5));
-      const querySnapshot = await getDocs(q);
-      const history = querySnapshot.docs.map(doc => ({ id: doc.id, ...doc.data() }));
-      setComplianceHistory(history);
+      const user = auth.currentUser;
+      if (!user) return;
+      const idToken = await user.getIdToken();
+      const response = await fetch('http://localhost:5001/api/compliance-history?limit=5', {
+        headers: { 'Authorization': `Bearer ${idToken}` }
+      });
+      if (!response.ok) throw new Error(`Error from API: ${response.status}`);
+      const page = await response.json();
+      setComplianceHistory(page.items || []);
     } catch (error) {
       console.error('Error fetching compliance history:', error);
       toast.error('Failed to load compliance history');
     }
   };
 
-  const handleContentExtracted = (content: string, name: string, type: string) => {
-    setFileContent(content);
-    setFileName(name);
-    setFileType(type);
+  const handleFileSelected = (selected: File | null) => {
+    setFile(selected);
     setAnalysisCompleted(false);
     setComplianceResults(null);
   };
@@ -52,7 +50,7 @@ const ComplianceAuditor = () => {
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     
-    if (!fileContent) {
+    if (!file) {
       toast.error('Please select a file to analyze');
       return;
     }
@@ -66,19 +64,17 @@ const ComplianceAuditor = () => {
       const user = auth.currentUser;
       if (!user) throw new Error('User not authenticated');
       const idToken = await user.getIdToken();
+      // The file itself is uploaded; the backend extracts text page by page and keeps the line layout
+      const formData = new FormData();
+      formData.append('file', file);
       const response = await fetch(
-        'http://localhost:5001/api/analyze-compliance',
+        'http://localhost:5001/api/analyze-compliance-upload',
         {
           method: 'POST',
           headers: {
-            'Content-Type': 'application/json',
             'Authorization': `Bearer ${idToken}`
           },
-          body: JSON.stringify({
-            document_text: fileContent,
-            document_name: fileName,
-            document_type: fileType || 'text/plain'
-          })
+          body: formData
         }
       );
 
@@ -93,24 +89,8 @@ const ComplianceAuditor = () => {
       setAnalysisCompleted(true);
       toast.success('Document analysis completed');
 
-      // Save analysis result to Firestore
-      try {
-        const { db } = await import('../firebase');
-        const { collection, addDoc, serverTimestamp } = await import('firebase/firestore');
-        await addDoc(collection(db, 'compliance_checks'), {
-          document_name: fileName,
-          compliance_status: result.overallCompliance || result.compliance_status || 'Unknown',
-          created_at: serverTimestamp(),
-          user_uid: user.uid,
-          user_email: user.email,
-          result: result
-        });
-        // Refresh history after saving
-        fetchComplianceHistory();
-      } catch (firestoreError) {
-        console.error('Error saving analysis to Firestore:', firestoreError);
-        toast.error('Failed to save analysis history');
-      }
+      // The backend persists the result; refresh history from its cache-backed endpoint
+      fetchComplianceHistory();
     } catch (error) {
       console.error('Error analyzing document:', error);
       toast.error(`Failed to analyze document: ${error instanceof Error ? error.message : 'Unknown error'}`);
@@ -146,14 +126,14 @@ const ComplianceAuditor = () => {
               <CardContent>
                 <form onSubmit={handleSubmit} className="space-y-6">
                   <DocumentUploader 
-                    onContentExtracted={handleContentExtracted}
+                    onFileSelected={handleFileSelected}
                     isAnalyzing={isAnalyzing}
                   />
 
                   <div className="flex justify-center">
                     <Button
                       type="submit"
-                      disabled={!fileContent || isAnalyzing}
+                      disabled={!file || isAnalyzing}
                       className="min-w-[200px]"
                     >
                       {isAnalyzing ? 'Analyzing...' : 'Analyze Document'}
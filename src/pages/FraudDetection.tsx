@@ -17,6 +17,7 @@ const FraudDetection = () => {
     phone: '',
     ipAddress: '',
     deviceId: '',
+    loanAmount: '',
     loginFrequency: '',
     location: '',
     applicationTime: '',
@@ -95,6 +96,7 @@ const FraudDetection = () => {
         phone: formData.phone,
         location: formData.location,
         ipAddress: formData.ipAddress,
+        loanAmount: formData.loanAmount,
         analyzedAt: new Date().toISOString()
       }, ...prev]);
       toast.success('Fraud analysis completed using AI model');
@@ -191,6 +193,18 @@ const FraudDetection = () => {
                       />
                     </div>
                     
+                    <div className="space-y-2">
+                      <Label htmlFor="loanAmount">Loan Amount Requested</Label>
+                      <Input 
+                        id="loanAmount" 
+                        name="loanAmount" 
+                        type="number" 
+                        value={formData.loanAmount}
+                        onChange={handleInputChange}
+                        placeholder="Enter amount" 
+                      />
+                    </div>
+                    
                     <div className="space-y-2">
                       <Label htmlFor="loginFrequency">Login Frequency (last 7 days)</Label>
                       <Input 
@@ -422,6 +436,7 @@ const FraudDetection = () => {
     phone: formData.phone,
     location: formData.location,
     ipAddress: formData.ipAddress,
+    loanAmount: formData.loanAmount,
     analyzedAt: new Date().toISOString()
   };
   const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
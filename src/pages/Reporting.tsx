@@ -48,15 +48,18 @@ const Reporting = () => {
   } | null>(null);
 
   useEffect(() => {
-    // Migrate: Fetch recent reports from Firestore instead of Supabase
+    // Recent reports are served (paginated and cached) by the backend
     const fetchReports = async () => {
       try {
-        const { db } = await import('../firebase');
-        const { collection, getDocs, orderBy, limit, query } = await import('firebase/firestore');
-        const q = query(collection(db, 'regulatory_reports'), orderBy('created_at', 'desc'), limit(5));
-        const querySnapshot = await getDocs(q);
-        const reports = querySnapshot.docs.map(doc => ({ id: doc.id, ...doc.data() }));
-        setRecentReports(reports);
+        const user = auth.currentUser;
+        if (!user) return;
+        const idToken = await user.getIdToken();
+        const response = await fetch('http://localhost:5001/api/reports?limit=5', {
+          headers: { 'Authorization': `Bearer ${idToken}` }
+        });
+        if (!response.ok) throw new Error(`Error from API: ${response.status}`);
+        const page = await response.json();
+        setRecentReports(page.items || []);
       } catch (error) {
         console.error('Error fetching reports:', error);
         toast.error('Failed to load recent reports');